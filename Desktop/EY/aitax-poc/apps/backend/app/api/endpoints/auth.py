@@ -1,9 +1,11 @@
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import (
     Token, 
@@ -12,7 +14,7 @@ from app.core.auth import (
     get_password_hash
 )
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.models.user import User, UserCreate, UserRead
 
 router = APIRouter()
@@ -21,10 +23,10 @@ router = APIRouter()
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Login endpoint to get JWT token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,6 +34,11 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Remember when the user was last active
+    user.last_login_at = datetime.utcnow()
+    db.add(user)
+    await db.commit()
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -43,11 +50,11 @@ async def login_for_access_token(
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_create: UserCreate,
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Register a new user"""
     # Check if user with email already exists
-    existing_user = db.exec(select(User).where(User.email == user_create.email)).first()
+    existing_user = (await db.exec(select(User).where(User.email == user_create.email))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -55,7 +62,7 @@ async def register_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_create.password)
     db_user = User(
         email=user_create.email,
         hashed_password=hashed_password,
@@ -64,7 +71,7 @@ async def register_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
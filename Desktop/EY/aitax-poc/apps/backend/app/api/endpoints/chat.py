@@ -1,27 +1,59 @@
-from typing import Annotated, List
+import asyncio
+import json
+import time
+from typing import Annotated, Any, AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.background import BackgroundTask
 
 from app.core.auth import get_current_active_user
-from app.core.database import get_session
-from app.models.chat import ChatMessage, ChatMessageCreate, ChatMessageRead, MessageRole
+from app.core.database import async_engine, get_async_session
+from app.core.metrics import metrics
+from app.core.pagination import page_items, paginate
+from app.models.chat import (
+    ChatMessage,
+    ChatMessageCreate,
+    ChatMessageRead,
+    LibraryAnswer,
+    LibraryQuestion,
+    MessageRole,
+)
 from app.models.document import Document
 from app.models.user import User
-from app.services.ai import generate_document_answer
+from app.services.ai import (
+    document_answer_error,
+    generate_document_answer,
+    generate_library_answer,
+    stream_document_answer,
+)
+from app.services.chat_memory import load_chat_memory, update_chat_summary
 
 router = APIRouter()
 
+first_token_seconds = metrics.gauge("chat_stream_first_token_seconds", "Time to first token of the last streamed answer")
+streams_cancelled = metrics.counter("chat_streams_cancelled_total", "Streamed answers stopped by a client disconnect")
+
 
 @router.get("/document/{document_id}", response_model=List[ChatMessageRead])
 async def get_chat_history(
     document_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(default=50, ge=1, le=200)
 ):
-    """Get chat history for a specific document"""
+    """Get chat history for a specific document
+    
+    Returns the latest messages in chronological order; pass the
+    X-Next-Cursor response header as `cursor` to get earlier messages.
+    """
     # Check if document exists and belongs to user
-    document = db.get(Document, document_id)
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -34,26 +66,31 @@ async def get_chat_history(
             detail="Not authorized to access this document"
         )
     
-    # Get chat messages
-    messages = db.exec(
-        select(ChatMessage)
-        .where(ChatMessage.document_id == document_id)
-        .order_by(ChatMessage.created_at)
-    ).all()
+    # Get the page of messages newest first, then put it in reading order
+    query = paginate(
+        select(ChatMessage).where(ChatMessage.document_id == document_id),
+        ChatMessage.created_at,
+        ChatMessage.id,
+        cursor,
+        skip,
+        limit
+    )
+    messages = page_items((await db.exec(query)).all(), limit, response, "created_at")
     
-    return messages
+    return list(reversed(messages))
 
 
 @router.post("/document/{document_id}", response_model=ChatMessageRead)
 async def ask_question(
     document_id: int,
     message: ChatMessageCreate,
+    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Ask a question about a document and get an AI-generated answer"""
     # Check if document exists and belongs to user
-    document = db.get(Document, document_id)
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -82,11 +119,12 @@ async def ask_question(
     )
     
     db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
+    await db.commit()
+    await db.refresh(user_message)
     
-    # Generate AI answer
-    answer = await generate_document_answer(document, message.content)
+    # Generate AI answer with the conversation so far
+    memory = await load_chat_memory(document_id, before_id=user_message.id)
+    answer = await generate_document_answer(document, message.content, memory)
     
     # Save AI response
     ai_message = ChatMessage(
@@ -97,7 +135,143 @@ async def ask_question(
     )
     
     db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
+    await db.commit()
+    await db.refresh(ai_message)
+    
+    # Fold the turn that left the recent window into the summary before the next question
+    background_tasks.add_task(update_chat_summary, document_id)
     
     return ai_message
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/document/{document_id}/stream")
+async def ask_question_stream(
+    document_id: int,
+    message: ChatMessageCreate,
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """Ask a question about a document and stream the answer as server-sent events
+    
+    Emits `token` events as the answer is generated, an `error` event if generation
+    fails, and a final `done` event carrying the saved assistant message.
+    """
+    # Check if document exists and belongs to user
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    if document.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this document"
+        )
+    
+    # Validate message
+    if message.role != MessageRole.USER:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only user messages can be sent"
+        )
+    
+    # Save user message
+    user_message = ChatMessage(
+        content=message.content,
+        role=MessageRole.USER,
+        document_id=document_id,
+        user_id=current_user.id
+    )
+    
+    db.add(user_message)
+    await db.commit()
+    
+    memory = await load_chat_memory(document_id, before_id=user_message.id)
+    
+    # Load the document again so it stays usable after the request session closes
+    await db.refresh(document)
+    user_id = current_user.id
+    
+    async def event_stream() -> AsyncIterator[str]:
+        start = time.perf_counter()
+        tokens: List[str] = []
+        
+        try:
+            async for token in stream_document_answer(document, message.content, memory):
+                # Stop generating once nobody is listening; nothing is saved
+                if await request.is_disconnected():
+                    streams_cancelled.inc()
+                    return
+                
+                if not tokens:
+                    first_token_seconds.set(time.perf_counter() - start)
+                tokens.append(token)
+                yield _sse_event("token", {"content": token})
+            
+            answer = "".join(tokens)
+        
+        except asyncio.CancelledError:
+            # The server cancels the stream when the client goes away
+            streams_cancelled.inc()
+            raise
+        except Exception as e:
+            answer = document_answer_error(e)
+            yield _sse_event("error", {"detail": answer})
+        
+        # Save AI response once the answer is complete
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            ai_message = ChatMessage(
+                content=answer,
+                role=MessageRole.ASSISTANT,
+                document_id=document_id,
+                user_id=user_id
+            )
+            
+            session.add(ai_message)
+            await session.commit()
+            await session.refresh(ai_message)
+            
+            yield _sse_event("done", ChatMessageRead.model_validate(ai_message).model_dump(mode="json"))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(update_chat_summary, document_id)
+    )
+
+
+@router.post("/library", response_model=LibraryAnswer)
+async def ask_library_question(
+    question: LibraryQuestion,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """Ask a question across all of the user's documents and get an answer with its sources"""
+    # Search the whole library, or only the requested documents
+    query = select(Document).where(Document.user_id == current_user.id)
+    if question.document_ids is not None:
+        query = query.where(Document.id.in_(question.document_ids))
+    documents = (await db.exec(query)).all()
+    
+    if question.document_ids is not None and len(documents) != len(set(question.document_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    if not documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No documents to search. Upload a document first."
+        )
+    
+    return await generate_library_answer(current_user.id, documents, question.content)
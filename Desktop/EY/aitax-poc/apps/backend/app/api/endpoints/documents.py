@@ -1,7 +1,5 @@
-import os
-import shutil
-from datetime import datetime
-from typing import Annotated, List
+import asyncio
+from typing import Annotated, List, Optional
 
 from fastapi import (
     APIRouter, 
@@ -9,17 +7,37 @@ from fastapi import (
     File, 
     Form, 
     HTTPException, 
+    Query, 
+    Response, 
     UploadFile, 
     status
 )
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import get_current_active_user
 from app.core.config import settings
-from app.core.database import get_session
-from app.models.document import Document, DocumentRead, DocumentType, DocumentUpdate
+from app.core.database import get_async_session
+from app.core.pagination import page_items, paginate
+from app.models.document import (
+    Document, 
+    DocumentRead, 
+    DocumentStatusRead, 
+    DocumentType, 
+    DocumentUpdate
+)
+from app.models.ingestion import IngestionJob
 from app.models.user import User
-from app.services.document_processor import process_document
+from app.services.answer_cache import invalidate_document_answers
+from app.services.chat_memory import delete_chat_summary
+from app.services.ingestion import enqueue_document, get_latest_job
+from app.services.lexical_index import delete_lexical_index
+from app.services.storage import commit_file, content_path, file_lock, release_file, store_upload
+from app.services.vector_cache import vector_cache
+from app.services.vector_store import (
+    delete_document_vectors, 
+    update_document_vector_metadata
+)
 
 router = APIRouter()
 
@@ -27,28 +45,36 @@ router = APIRouter()
 @router.get("", response_model=List[DocumentRead])
 async def get_all_documents(
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    response: Response,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 10
+    limit: int = Query(default=10, ge=1, le=100)
 ):
-    """Get all documents for the current user with pagination"""
-    documents = db.exec(
-        select(Document)
-        .where(Document.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-    ).all()
-    return documents
+    """Get all documents for the current user, newest first, with pagination
+    
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
+    query = paginate(
+        select(Document).where(Document.user_id == current_user.id),
+        Document.created_at,
+        Document.id,
+        cursor,
+        skip,
+        limit
+    )
+    documents = (await db.exec(query)).all()
+    return page_items(documents, limit, response, "created_at")
 
 
 @router.get("/{document_id}", response_model=DocumentRead)
 async def get_document(
     document_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Get a specific document by ID"""
-    document = db.get(Document, document_id)
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,24 +94,15 @@ async def get_document(
 @router.post("", response_model=DocumentRead, status_code=status.HTTP_201_CREATED)
 async def upload_document(
     title: Annotated[str, Form()],
-    description: Annotated[str, Form()] = None,
     file: Annotated[UploadFile, File()],
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    description: Annotated[Optional[str], Form()] = None
 ):
     """Upload a new document"""
-    # Check file size
-    file_size = 0
-    file_contents = await file.read()
-    file_size = len(file_contents)
-    await file.seek(0)  # Reset file pointer
-    
+    # The request body was bounded while it was received (RequestSizeLimitMiddleware);
+    # the exact file size limit is enforced while copying the spooled file
     max_size = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024  # Convert to bytes
-    if file_size > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB} MB"
-        )
     
     # Check file extension
     file_ext = file.filename.split(".")[-1].lower()
@@ -95,47 +112,80 @@ async def upload_document(
             detail=f"Unsupported file type. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
-    # Create upload directory if it doesn't exist
-    upload_dir = f"/data/uploads/{current_user.id}"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save file
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    file_path = f"{upload_dir}/{timestamp}_{file.filename}"
-    
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_contents)
-    
-    # Create document record
-    db_document = Document(
-        title=title,
-        description=description,
-        file_path=file_path,
-        file_type=DocumentType(file_ext),
-        file_size=file_size,
-        user_id=current_user.id
-    )
+    # Copy file to a temporary file in chunks, enforcing the size limit while reading
+    tmp_path, content_hash, file_size = await store_upload(file, file_ext, max_size)
+    file_path = content_path(content_hash, file_ext)
     
-    db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
+    # Keep a concurrent delete of identical content from removing the file before the commit
+    async with file_lock(file_path):
+        await asyncio.to_thread(commit_file, tmp_path, file_path)
+        
+        # Create document record
+        db_document = Document(
+            title=title,
+            description=description,
+            file_path=file_path,
+            file_type=DocumentType(file_ext),
+            file_size=file_size,
+            content_hash=content_hash,
+            user_id=current_user.id
+        )
+        
+        db.add(db_document)
+        await db.flush()
+        
+        # Queue document for background processing in the same transaction
+        await db.run_sync(enqueue_document, db_document.id)
+        
+        await db.commit()
     
-    # Process document in background
-    await process_document(db_document.id)
+    await db.refresh(db_document)
     
     return db_document
 
 
+@router.get("/{document_id}/status", response_model=DocumentStatusRead)
+async def get_document_status(
+    document_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """Get the processing status of a document"""
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    # Check if document belongs to current user
+    if document.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this document"
+        )
+    
+    job = await db.run_sync(get_latest_job, document_id)
+    
+    return DocumentStatusRead(
+        document_id=document.id,
+        status=document.status,
+        attempts=job.attempts if job else 0,
+        last_error=job.last_error if job else None,
+        updated_at=document.updated_at
+    )
+
+
 @router.put("/{document_id}", response_model=DocumentRead)
 async def update_document(
     document_id: int,
     document_update: DocumentUpdate,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Update document metadata"""
     # Get existing document
-    document = db.get(Document, document_id)
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,8 +207,18 @@ async def update_document(
     document.updated_at = document.updated_at  # Trigger update of updated_at field
     
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
+    
+    # Keep the title stored on the document's chunks in sync
+    if "title" in document_data:
+        vector_cache.invalidate(document_id)
+        try:
+            await asyncio.to_thread(
+                update_document_vector_metadata, document_id, document.user_id, {"title": document.title}
+            )
+        except Exception as e:
+            print(f"Error updating vectors for document {document_id}: {str(e)}")
     
     return document
 
@@ -167,11 +227,11 @@ async def update_document(
 async def delete_document(
     document_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Delete a document"""
     # Get existing document
-    document = db.get(Document, document_id)
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -185,12 +245,30 @@ async def delete_document(
             detail="Not authorized to delete this document"
         )
     
-    # Delete file
-    if os.path.exists(document.file_path):
-        os.remove(document.file_path)
+    # Delete ingestion jobs for the document
+    jobs = (await db.exec(
+        select(IngestionJob).where(IngestionJob.document_id == document_id)
+    )).all()
+    for job in jobs:
+        await db.delete(job)
+    
+    # Delete cached answers, the chat summary and the lexical index of the document
+    await db.run_sync(invalidate_document_answers, document_id)
+    await db.run_sync(delete_chat_summary, document_id)
+    await db.run_sync(delete_lexical_index, document_id)
+    
+    # Delete document, then its file once committed unless another upload shares the content
+    file_path = document.file_path
+    async with file_lock(file_path):
+        await db.delete(document)
+        await db.commit()
+        await db.run_sync(release_file, file_path)
     
-    # Delete document
-    db.delete(document)
-    db.commit()
+    # Remove the document's chunks; anything missed is purged by reconciliation
+    vector_cache.invalidate(document_id)
+    try:
+        await asyncio.to_thread(delete_document_vectors, document_id, current_user.id)
+    except Exception as e:
+        print(f"Error deleting vectors for document {document_id}: {str(e)}")
     
     return None
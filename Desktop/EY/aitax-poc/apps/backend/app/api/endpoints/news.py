@@ -1,14 +1,24 @@
-from typing import Annotated, List
+from datetime import datetime
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import get_current_active_user
-from app.core.database import get_session
-from app.models.news import News, NewsCreate, NewsRead, NewsUpdate
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.core.pagination import page_items, paginate
+from app.models.news import News, NewsCreate, NewsRead, NewsSearchResult, NewsUpdate, TaxCategory
 from app.models.profile import CompanyProfile
 from app.models.user import User
-from app.services.ai import generate_personalized_summary
+from app.services.news_search import delete_news_index, highlight, index_news, search_query, snippet
+from app.services.summary_cache import (
+    get_personalized_summary,
+    invalidate_news_summaries,
+    news_prompt_values,
+)
+from app.services.summary_precompute import precompute_news_summaries
 
 router = APIRouter()
 
@@ -16,23 +26,68 @@ router = APIRouter()
 @router.get("", response_model=List[NewsRead])
 async def get_all_news(
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    response: Response,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 10
+    limit: int = Query(default=10, ge=1, le=100)
 ):
-    """Get all news items with pagination"""
-    news = db.exec(select(News).offset(skip).limit(limit)).all()
-    return news
+    """Get all news items, newest first, with pagination
+    
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
+    query = paginate(select(News), News.published_date, News.id, cursor, skip, limit)
+    news = (await db.exec(query)).all()
+    return page_items(news, limit, response, "published_date")
+
+
+@router.get("/search", response_model=List[NewsSearchResult])
+async def search_news(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    q: str = Query(min_length=1, max_length=200),
+    category: Optional[TaxCategory] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(default=10, ge=1, le=50)
+):
+    """Search news titles, summaries and content, best match first
+    
+    Polish words match in any inflected form and with or without diacritics.
+    """
+    query = search_query(db.bind.dialect.name, q, category, date_from, date_to, skip, limit)
+    if query is None:
+        return []
+    
+    # News rows come from the ranking query itself, so a concurrent delete cannot break a result
+    ranked = (await db.exec(query)).all()
+    
+    results = []
+    for news, rank in ranked:
+        results.append(NewsSearchResult(
+            id=news.id,
+            title=news.title,
+            summary=news.summary,
+            category=news.category,
+            source_url=news.source_url,
+            published_date=news.published_date,
+            rank=rank,
+            title_highlight=highlight(news.title, q),
+            snippet=snippet(news.content, q)
+        ))
+    
+    return results
 
 
 @router.get("/{news_id}", response_model=NewsRead)
 async def get_news(
     news_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Get a specific news item by ID"""
-    news = db.get(News, news_id)
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,11 +100,11 @@ async def get_news(
 async def get_personalized_news(
     news_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Get a personalized summary of why a news item is relevant to the user"""
     # Get the news item
-    news = db.get(News, news_id)
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,9 +112,9 @@ async def get_personalized_news(
         )
     
     # Get user's company profile
-    profile = db.exec(
+    profile = (await db.exec(
         select(CompanyProfile).where(CompanyProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if not profile:
         raise HTTPException(
@@ -67,8 +122,8 @@ async def get_personalized_news(
             detail="User profile not found. Please complete your profile first."
         )
     
-    # Generate personalized summary using AI
-    personalized_summary = await generate_personalized_summary(news, profile)
+    # Get personalized summary, generating it with AI on first view
+    personalized_summary = await get_personalized_summary(db, news, profile)
     
     return {
         "news_id": news_id,
@@ -80,8 +135,9 @@ async def get_personalized_news(
 @router.post("", response_model=NewsRead, status_code=status.HTTP_201_CREATED)
 async def create_news(
     news_create: NewsCreate,
+    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Create a new news item (admin only)"""
     # Check if user is admin
@@ -95,8 +151,14 @@ async def create_news(
     db_news = News(**news_create.model_dump())
     
     db.add(db_news)
-    db.commit()
-    db.refresh(db_news)
+    await db.flush()
+    await db.run_sync(index_news, db_news)
+    await db.commit()
+    await db.refresh(db_news)
+    
+    # Generate personalized summaries before users open the article
+    if settings.SUMMARY_PRECOMPUTE_ENABLED:
+        background_tasks.add_task(precompute_news_summaries, db_news.id)
     
     return db_news
 
@@ -105,8 +167,9 @@ async def create_news(
 async def update_news(
     news_id: int,
     news_update: NewsUpdate,
+    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Update a news item (admin only)"""
     # Check if user is admin
@@ -117,7 +180,7 @@ async def update_news(
         )
     
     # Get existing news
-    news = db.get(News, news_id)
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -125,15 +188,26 @@ async def update_news(
         )
     
     # Update news with non-None values
+    prompt_values = news_prompt_values(news)
     news_data = news_update.model_dump(exclude_unset=True)
     for key, value in news_data.items():
         setattr(news, key, value)
     
     news.updated_at = news.updated_at  # Trigger update of updated_at field
     
+    # Personalized summaries are stale once the text they were written from changes
+    prompt_changed = news_prompt_values(news) != prompt_values
+    if prompt_changed:
+        await db.run_sync(invalidate_news_summaries, news_id)
+    
     db.add(news)
-    db.commit()
-    db.refresh(news)
+    await db.flush()
+    await db.run_sync(index_news, news)
+    await db.commit()
+    await db.refresh(news)
+    
+    if prompt_changed and settings.SUMMARY_PRECOMPUTE_ENABLED:
+        background_tasks.add_task(precompute_news_summaries, news_id)
     
     return news
 
@@ -142,7 +216,7 @@ async def update_news(
 async def delete_news(
     news_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Delete a news item (admin only)"""
     # Check if user is admin
@@ -153,15 +227,17 @@ async def delete_news(
         )
     
     # Get existing news
-    news = db.get(News, news_id)
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="News not found"
         )
     
-    # Delete news
-    db.delete(news)
-    db.commit()
+    # Delete news with its cached summaries and search index entry
+    await db.run_sync(invalidate_news_summaries, news_id)
+    await db.run_sync(delete_news_index, news_id)
+    await db.delete(news)
+    await db.commit()
     
     return None
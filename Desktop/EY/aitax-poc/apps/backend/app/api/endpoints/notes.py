@@ -1,10 +1,12 @@
 from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import get_current_active_user
-from app.core.database import get_session
+from app.core.database import get_async_session
+from app.core.pagination import page_items, paginate
 from app.models.document import Document
 from app.models.news import News
 from app.models.note import Note, NoteCreate, NoteRead, NoteUpdate
@@ -16,13 +18,18 @@ router = APIRouter()
 @router.get("", response_model=List[NoteRead])
 async def get_all_notes(
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    response: Response,
     news_id: Optional[int] = None,
     document_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 10
+    limit: int = Query(default=10, ge=1, le=100)
 ):
-    """Get all notes for the current user with optional filtering"""
+    """Get all notes for the current user, newest first, with optional filtering
+    
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
     query = select(Note).where(Note.user_id == current_user.id)
     
     if news_id:
@@ -31,18 +38,19 @@ async def get_all_notes(
     if document_id:
         query = query.where(Note.document_id == document_id)
     
-    notes = db.exec(query.offset(skip).limit(limit)).all()
-    return notes
+    query = paginate(query, Note.created_at, Note.id, cursor, skip, limit)
+    notes = (await db.exec(query)).all()
+    return page_items(notes, limit, response, "created_at")
 
 
 @router.get("/{note_id}", response_model=NoteRead)
 async def get_note(
     note_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Get a specific note by ID"""
-    note = db.get(Note, note_id)
+    note = await db.get(Note, note_id)
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,12 +71,12 @@ async def get_note(
 async def create_note(
     note_create: NoteCreate,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Create a new note"""
     # Validate references
     if note_create.news_id:
-        news = db.get(News, note_create.news_id)
+        news = await db.get(News, note_create.news_id)
         if not news:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -76,7 +84,7 @@ async def create_note(
             )
     
     if note_create.document_id:
-        document = db.get(Document, note_create.document_id)
+        document = await db.get(Document, note_create.document_id)
         if not document:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -94,8 +102,8 @@ async def create_note(
     db_note = Note(**note_create.model_dump(), user_id=current_user.id)
     
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     
     return db_note
 
@@ -105,11 +113,11 @@ async def update_note(
     note_id: int,
     note_update: NoteUpdate,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Update a note"""
     # Get existing note
-    note = db.get(Note, note_id)
+    note = await db.get(Note, note_id)
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,8 +139,8 @@ async def update_note(
     note.updated_at = note.updated_at  # Trigger update of updated_at field
     
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
     
     return note
 
@@ -141,11 +149,11 @@ async def update_note(
 async def delete_note(
     note_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Delete a note"""
     # Get existing note
-    note = db.get(Note, note_id)
+    note = await db.get(Note, note_id)
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,7 +168,7 @@ async def delete_note(
         )
     
     # Delete note
-    db.delete(note)
-    db.commit()
+    await db.delete(note)
+    await db.commit()
     
     return None
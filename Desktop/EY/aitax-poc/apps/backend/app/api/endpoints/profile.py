@@ -1,10 +1,12 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import get_current_active_user
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.models.profile import (
     CompanyProfile, 
     CompanyProfileCreate, 
@@ -12,6 +14,7 @@ from app.models.profile import (
     CompanyProfileUpdate
 )
 from app.models.user import User
+from app.services.summary_cache import invalidate_profile_summaries, profile_fingerprint
 
 router = APIRouter()
 
@@ -19,12 +22,12 @@ router = APIRouter()
 @router.get("", response_model=CompanyProfileRead)
 async def get_profile(
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Get the current user's company profile"""
-    profile = db.exec(
+    profile = (await db.exec(
         select(CompanyProfile).where(CompanyProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if not profile:
         raise HTTPException(
@@ -39,13 +42,13 @@ async def get_profile(
 async def create_profile(
     profile_create: CompanyProfileCreate,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Create a new company profile for the current user"""
     # Check if user already has a profile
-    existing_profile = db.exec(
+    existing_profile = (await db.exec(
         select(CompanyProfile).where(CompanyProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if existing_profile:
         raise HTTPException(
@@ -57,8 +60,16 @@ async def create_profile(
     db_profile = CompanyProfile(**profile_create.model_dump(), user_id=current_user.id)
     
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request created the profile first
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User already has a profile"
+        )
+    await db.refresh(db_profile)
     
     return db_profile
 
@@ -67,13 +78,13 @@ async def create_profile(
 async def update_profile(
     profile_update: CompanyProfileUpdate,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ):
     """Update the current user's company profile"""
     # Get existing profile
-    profile = db.exec(
+    profile = (await db.exec(
         select(CompanyProfile).where(CompanyProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if not profile:
         raise HTTPException(
@@ -82,14 +93,19 @@ async def update_profile(
         )
     
     # Update profile with non-None values
+    fingerprint = profile_fingerprint(profile)
     profile_data = profile_update.model_dump(exclude_unset=True)
     for key, value in profile_data.items():
         setattr(profile, key, value)
     
     profile.updated_at = profile.updated_at  # Trigger update of updated_at field
     
+    # Summaries written for the old profile no longer apply
+    if profile_fingerprint(profile) != fingerprint:
+        await db.run_sync(invalidate_profile_summaries, fingerprint)
+    
     db.add(profile)
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await db.refresh(profile)
     
     return profile
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Annotated, Optional
 
@@ -6,10 +7,11 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.models.user import User
 
 # Password hashing
@@ -38,12 +40,13 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate user with email and password"""
-    user = db.exec(select(User).where(User.email == email)).first()
+    user = (await db.exec(select(User).where(User.email == email))).first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is deliberately slow, so keep it off the event loop
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
     return user
 
@@ -65,7 +68,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)]
 ) -> User:
     """Get current user from token"""
     credentials_exception = HTTPException(
@@ -83,7 +86,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.exec(select(User).where(User.email == token_data.email)).first()
+    user = (await db.exec(select(User).where(User.email == token_data.email))).first()
     if user is None:
         raise credentials_exception
     
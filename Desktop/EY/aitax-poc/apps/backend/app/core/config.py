@@ -19,6 +19,13 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str = "sqlite:///./aitax.db"
+    DATABASE_ECHO: bool = False  # Log every SQL statement
+    # Connection pool settings, per engine (the app runs a sync and an async engine)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10  # Connections opened beyond the pool size under load
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Replace connections older than this; -1 keeps them
+    DB_POOL_PRE_PING: bool = True
 
     # Authentication
     SECRET_KEY: str
@@ -26,17 +33,109 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
 
     # AI/LLM settings
-    OPENAI_API_KEY: str
+    MODEL_PROVIDER: str = "openai"  # "openai" or "fake" for local load tests
+    OPENAI_API_KEY: str = ""  # Required by the openai provider
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     CHAT_MODEL: str = "gpt-4o"
+    FAST_CHAT_MODEL: str = "gpt-4o-mini"
+
+    # Model routing settings
+    MODEL_ROUTING_ENABLED: bool = True  # Send simple requests to FAST_CHAT_MODEL
+    ROUTER_FAST_MAX_PROMPT_TOKENS: int = 2500
+    ROUTER_FAST_MAX_QUESTION_WORDS: int = 20
+    ROUTER_CONFIDENCE_PROBE_CHARS: int = 200  # Streamed fast answer held back before fallback check
+
+    # Fake model provider settings (latencies in milliseconds)
+    FAKE_LATENCY_DISTRIBUTION: str = "lognormal"  # constant, uniform, normal or lognormal
+    FAKE_LATENCY_SEED: int = 0
+    FAKE_CHAT_LATENCY_MS: float = 600.0  # Time to first token
+    FAKE_CHAT_LATENCY_STDDEV_MS: float = 200.0
+    FAKE_TOKEN_LATENCY_MS: float = 20.0  # Between streamed words
+    FAKE_TOKEN_LATENCY_STDDEV_MS: float = 5.0
+    FAKE_RESPONSE_WORDS: int = 150
+    FAKE_EMBEDDING_LATENCY_MS: float = 150.0  # Per embedding request
+    FAKE_EMBEDDING_LATENCY_STDDEV_MS: float = 50.0
+    FAKE_EMBEDDING_DIMENSIONS: int = 1536
+
+    # HTTP connection pool settings (model API)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_TIMEOUT_SECONDS: float = 60.0
 
     # ChromaDB settings
     CHROMA_HOST: str = "chroma"
     CHROMA_PORT: int = 8000
     CHROMA_COLLECTION_PREFIX: str = "dev"
+    VECTOR_PARTITION_SHARDS: int = 32  # Collections users are hashed into; 0 gives each user one
+    VECTOR_SYNC_BATCH_SIZE: int = 500
+    VECTOR_CACHE_MAX_MB: int = 256  # In-process cache of active documents' vectors
+
+    # News search settings
+    NEWS_SEARCH_SNIPPET_WORDS: int = 30  # Words of content shown around the first match
+
+    # Prompt budget settings
+    DOCUMENT_RETRIEVAL_K: int = 8  # Chunks retrieved before packing
+    DOCUMENT_CONTEXT_MAX_TOKENS: int = 3000
+    NEWS_CONTENT_MAX_TOKENS: int = 2000
+
+    # Document chat memory settings
+    CHAT_MEMORY_TURNS: int = 3  # Recent question and answer pairs kept verbatim
+    CHAT_HISTORY_MAX_TOKENS: int = 1500
+    CHAT_SUMMARY_MAX_TOKENS: int = 400
+
+    # Library chat settings (questions across all of a user's documents)
+    LIBRARY_CANDIDATES: int = 50  # Nearest chunks fetched before per-document capping
+    LIBRARY_RETRIEVAL_K: int = 10
+    LIBRARY_MAX_CHUNKS_PER_DOCUMENT: int = 3
+
+    # Hybrid retrieval settings
+    HYBRID_CANDIDATES: int = 30  # Chunks taken from each ranking before fusion
+    HYBRID_RRF_K: int = 60
+    LEXICAL_ONLY_IDENTIFIER_RATIO: float = 0.5  # Identifier share that skips embedding
+
+    # Document answer cache settings
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # Cosine similarity between questions
+    ANSWER_CACHE_MAX_ENTRIES_PER_DOCUMENT: int = 200
+
+    # Personalized summary precompute settings
+    SUMMARY_PRECOMPUTE_ENABLED: bool = True
+    SUMMARY_PRECOMPUTE_CONCURRENCY: int = 4
+    SUMMARY_PRECOMPUTE_TOKEN_BUDGET: int = 500000  # Estimated tokens per news item
+    SUMMARY_PRECOMPUTE_OUTPUT_TOKENS: int = 600  # Estimated completion tokens per summary
+
+    # Document chunking settings
+    CHUNK_SIZE_TOKENS: int = 512
+    CHUNK_OVERLAP_TOKENS: int = 64
+    CHUNK_BATCH_SIZE: int = 256
+
+    # Embedding client settings
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_CONCURRENCY: int = 4  # Shared by all ingestion workers in a process
+    EMBEDDING_MAX_RETRIES: int = 6
+    EMBEDDING_RETRY_MAX_WAIT_SECONDS: float = 60.0
+
+    # PDF extraction settings
+    PDF_EXTRACTION_WORKERS: int = os.cpu_count() or 1  # Shared by every document being ingested
+    PDF_PAGES_PER_TASK: int = 25
+    PDF_EXTRACTION_TIMEOUT_SECONDS: int = 300  # Per page range a worker extracts
+    TXT_BLOCK_SIZE_CHARS: int = 256 * 1024  # Text files are read and chunked a block at a time
+
+    # Ingestion queue settings
+    INGESTION_IN_PROCESS: bool = True  # Run workers inside the API process
+    INGESTION_WORKERS: int = 2
+    INGESTION_MAX_ATTEMPTS: int = 5
+    INGESTION_RETRY_BACKOFF_SECONDS: float = 5.0
+    INGESTION_POLL_INTERVAL_SECONDS: float = 1.0
+    INGESTION_LEASE_SECONDS: int = 900  # Running jobs not renewed for this long are reclaimed
+    INGESTION_HEARTBEAT_SECONDS: int = 60  # How often running jobs renew their lease
 
     # File upload settings
+    UPLOAD_DIR: str = "/data/uploads"
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
     MAX_UPLOAD_SIZE_MB: int = 10
+    UPLOAD_FORM_OVERHEAD_BYTES: int = 64 * 1024  # Multipart boundaries and form fields around the file
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "txt"]
 
     # CORS settings
@@ -1,12 +1,133 @@
+import time
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.metrics import metrics
+
+# Async drivers for the synchronous database URLs
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Rewrite a database URL to use the dialect's async driver"""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL scheme: {scheme}")
+    return f"{ASYNC_DRIVERS[dialect]}{separator}{rest}"
+
+
+class PoolMetrics:
+    """Checkout wait and saturation of one connection pool"""
+
+    def __init__(self, name: str):
+        prefix = f"db_pool_{name}"
+        self.checkouts = metrics.counter(f"{prefix}_checkouts_total", f"Connections checked out of the {name} pool")
+        self.wait = metrics.counter(
+            f"{prefix}_checkout_wait_seconds_total", f"Time spent waiting for a {name} pool connection"
+        )
+        self.last_wait = metrics.gauge(
+            f"{prefix}_last_checkout_wait_seconds", f"Wait of the last {name} pool checkout"
+        )
+        self.max_wait = metrics.gauge(
+            f"{prefix}_max_checkout_wait_seconds", f"Longest wait for a {name} pool connection"
+        )
+        self.timeouts = metrics.counter(
+            f"{prefix}_checkout_timeouts_total", f"Checkouts that gave up waiting for a {name} pool connection"
+        )
+        self.checked_out = metrics.gauge(f"{prefix}_checked_out", f"Connections of the {name} pool in use")
+        self.max_checked_out = metrics.gauge(
+            f"{prefix}_max_checked_out", f"Most connections of the {name} pool in use at once"
+        )
+        self.capacity = metrics.gauge(f"{prefix}_capacity", f"Connections the {name} pool may open")
+        self.saturation = metrics.gauge(f"{prefix}_saturation", f"Share of the {name} pool capacity in use")
+
+    def record_wait(self, elapsed: float) -> None:
+        self.checkouts.inc()
+        self.wait.inc(elapsed)
+        self.last_wait.set(elapsed)
+        if elapsed > self.max_wait.value:
+            self.max_wait.set(elapsed)
+
+    def record_usage(self, checked_out: int) -> None:
+        self.checked_out.set(checked_out)
+        if checked_out > self.max_checked_out.value:
+            self.max_checked_out.set(checked_out)
+        if self.capacity.value:
+            self.saturation.set(checked_out / self.capacity.value)
+
+
+class _MeteredPool:
+    """Mixin timing how long checkouts wait for a free connection"""
+
+    pool_metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Unlimited overflow has no ceiling; saturation is then measured against the pool size
+        max_overflow = max(kwargs.get("max_overflow", 10), 0)
+        self.pool_metrics.capacity.set(kwargs.get("pool_size", 5) + max_overflow)
+
+    def connect(self):
+        # Includes the pre-ping, so the wait covers getting a usable connection
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.pool_metrics.timeouts.inc()
+            raise
+        self.pool_metrics.record_wait(time.perf_counter() - start)
+        self.pool_metrics.record_usage(self.checkedout())
+        return connection
 
-# Create SQLite engine
-engine = create_engine(
-    settings.DATABASE_URL, 
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self.pool_metrics.record_usage(self.checkedout())
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pool_metrics = PoolMetrics("sync")
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pool_metrics = PoolMetrics("async")
+
+
+def engine_options(url: str, asynchronous: bool = False) -> Dict[str, Any]:
+    """Engine arguments for a database URL: pool sizing, health checks and logging"""
+    options: Dict[str, Any] = {
+        "echo": settings.DATABASE_ECHO,
+        "poolclass": MeteredAsyncQueuePool if asynchronous else MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        # Replace connections before the server or a proxy drops them as idle
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # Test connections on checkout, so a database restart does not fail requests
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite") and not asynchronous:
+        # Connections are shared with threads of the worker and thread pool
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+# Sync engine for the ingestion worker, background jobs and scripts
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+# Async engine for request handlers, so queries do not block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, asynchronous=True)
 )
 
 
@@ -19,3 +140,13 @@ def get_session():
     """Get database session"""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Get async database session
+
+    Objects stay loaded after commit, since expired attributes cannot be
+    lazily refreshed outside an await.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
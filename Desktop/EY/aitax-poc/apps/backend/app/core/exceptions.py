@@ -100,6 +100,22 @@ class BadRequestException(AppException):
         )
 
 
+class PayloadTooLargeException(AppException):
+    """Request payload too large exception"""
+    def __init__(
+        self,
+        detail: Any = "Payload too large",
+        headers: Optional[Dict[str, Any]] = None,
+        error_code: Optional[str] = "PAYLOAD_TOO_LARGE",
+    ):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=detail,
+            headers=headers,
+            error_code=error_code,
+        )
+
+
 class ValidationException(AppException):
     """Validation error exception"""
     def __init__(
@@ -0,0 +1,71 @@
+import threading
+from typing import Dict
+
+
+class Counter:
+    """Monotonically increasing, thread-safe counter"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge value"""
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class MetricsRegistry:
+    """In-process registry of named metrics"""
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Get or create a counter"""
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name, description)
+            return self._counters[name]
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        """Get or create a gauge"""
+        with self._lock:
+            if name not in self._gauges:
+                self._gauges[name] = Gauge(name, description)
+            return self._gauges[name]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Get the current value of every metric"""
+        values = {name: counter.value for name, counter in self._counters.items()}
+        values.update({name: gauge.value for name, gauge in self._gauges.items()})
+        return dict(sorted(values.items()))
+
+
+# Create metrics registry instance
+metrics = MetricsRegistry()
@@ -0,0 +1,45 @@
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.exceptions import PayloadTooLargeException, app_exception_handler
+
+
+class RequestSizeLimitMiddleware:
+    """Reject request bodies larger than a limit while they are received
+
+    Starlette reads and spools a whole multipart body before an endpoint
+    runs, so the limit has to be enforced on the request stream: a declared
+    Content-Length over the limit is rejected before reading, and a body
+    sent without one is cut off as soon as it passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, detail: str = "Request body too large"):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.detail = detail
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            request = Request(scope)
+            response = await app_exception_handler(request, PayloadTooLargeException(detail=self.detail))
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised while the endpoint parses the body, so the usual handler responds
+                    raise PayloadTooLargeException(detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.exceptions import BadRequestException
+
+T = TypeVar("T")
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode the position after a row as an opaque cursor"""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor into the sort value and ID of the row it points after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequestException(detail="Invalid cursor", error_code="INVALID_CURSOR")
+
+
+def paginate(
+    query: SelectOfScalar[T],
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = True,
+) -> SelectOfScalar[T]:
+    """Order a query by (sort column, ID) and select the page after a cursor
+
+    A cursor continues from an indexed position, so every page costs the
+    same; skip is kept for older clients and is ignored with a cursor.
+    One row beyond the limit is selected to tell whether a next page exists.
+    """
+    key = tuple_(sort_column, id_column)
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+
+    if cursor is not None:
+        # A plain tuple binds each value with its column's type
+        position = decode_cursor(cursor)
+        query = query.where(key < position if descending else key > position)
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit + 1)
+
+
+def page_items(
+    rows: Sequence[T], limit: int, response: Response, sort_field: str, id_field: str = "id"
+) -> List[T]:
+    """Trim the lookahead row of a page and set the next page's cursor header"""
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_field), getattr(last, id_field))
+    return items
@@ -0,0 +1,104 @@
+"""
+Plans of the hot endpoint queries and the index each must use.
+
+Covers the queries behind the news, chat history, notes and documents lists
+(on a page deep behind a cursor) and profile lookups. Checked by
+tests/test_query_plans.py and scripts/explain_queries.py.
+"""
+
+import re
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from sqlmodel import select
+
+from app.core.pagination import encode_cursor, paginate
+from app.models import ChatMessage, CompanyProfile, Document, News, Note
+
+# Placeholder IDs and cursor; plans do not depend on the values
+USER_ID = 1
+DOCUMENT_ID = 1
+NEWS_ID = 1
+CURSOR = encode_cursor(datetime(2026, 1, 1), 1000)
+PAGE_SIZE = 10
+
+# Plan steps that sort rows: SQLite's temporary B-tree, PostgreSQL's Sort and Incremental Sort nodes
+SORT_PATTERN = re.compile(r"TEMP B-TREE|\bSort\b")
+
+# Endpoint queries, on a deep page, and the index each must use
+QUERIES: List[Tuple[str, Select, str]] = [
+    (
+        "news",
+        paginate(select(News), News.published_date, News.id, CURSOR, 0, PAGE_SIZE),
+        "ix_news_published_date_id",
+    ),
+    (
+        "chat history",
+        paginate(
+            select(ChatMessage).where(ChatMessage.document_id == DOCUMENT_ID),
+            ChatMessage.created_at, ChatMessage.id, CURSOR, 0, 50
+        ),
+        "ix_chatmessage_document_id_created_at_id",
+    ),
+    (
+        "notes of a user",
+        paginate(select(Note).where(Note.user_id == USER_ID), Note.created_at, Note.id, CURSOR, 0, PAGE_SIZE),
+        "ix_note_user_id_created_at_id",
+    ),
+    (
+        "notes of a news item",
+        paginate(
+            select(Note).where(Note.user_id == USER_ID).where(Note.news_id == NEWS_ID),
+            Note.created_at, Note.id, CURSOR, 0, PAGE_SIZE
+        ),
+        "ix_note_user_id_news_id_created_at_id",
+    ),
+    (
+        "notes of a document",
+        paginate(
+            select(Note).where(Note.user_id == USER_ID).where(Note.document_id == DOCUMENT_ID),
+            Note.created_at, Note.id, CURSOR, 0, PAGE_SIZE
+        ),
+        "ix_note_user_id_document_id_created_at_id",
+    ),
+    (
+        "documents of a user",
+        paginate(
+            select(Document).where(Document.user_id == USER_ID),
+            Document.created_at, Document.id, CURSOR, 0, PAGE_SIZE
+        ),
+        "ix_document_user_id_created_at_id",
+    ),
+    (
+        "company profile",
+        select(CompanyProfile).where(CompanyProfile.user_id == USER_ID),
+        "ix_companyprofile_user_id",
+    ),
+]
+
+
+def prepare(connection: Connection) -> None:
+    """Make the planner use indexes even on small tables
+
+    On PostgreSQL sequential scans are disabled, since the planner rightly
+    prefers them on small tables.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SET enable_seqscan = off"))
+
+
+def explain(connection: Connection, query: Select) -> str:
+    """Get the database's plan for a query as text"""
+    sql = str(query.compile(connection, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    rows = connection.execute(text(prefix + sql)).all()
+    # SQLite puts the plan in the last column, PostgreSQL in the only one
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def uses_index(plan: str, index: str) -> bool:
+    """Check that a plan reads through an index without sorting the rows itself"""
+    return index in plan and not SORT_PATTERN.search(plan)
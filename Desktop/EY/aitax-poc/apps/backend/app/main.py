@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -6,6 +8,10 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.routes import api_router
 from app.core.config import settings
+from app.core.database import async_engine
+from app.core.metrics import metrics
+from app.core.middleware import RequestSizeLimitMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.core.exceptions import (
     AppException,
     app_exception_handler,
@@ -14,11 +20,45 @@ from app.core.exceptions import (
     http_exception_handler,
     unhandled_exception_handler
 )
+from app.services.clients import clients
+from app.services.extraction import extraction_pool
+from app.services.ingestion import IngestionWorkerPool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the application"""
+    # Shared model and vector store clients
+    clients.startup()
+    extraction_pool.startup()
+    
+    # Ingestion workers run in-process unless a separate worker is deployed
+    worker_pool = IngestionWorkerPool() if settings.INGESTION_IN_PROCESS else None
+    if worker_pool:
+        await worker_pool.start()
+    
+    yield
+    
+    if worker_pool:
+        await worker_pool.stop()
+    await extraction_pool.shutdown()
+    await clients.shutdown()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="AI Tax Insights API",
     description="API for AI-powered tax insights and document analysis",
     version="0.1.0",
+    lifespan=lifespan,
+)
+
+# Bound request bodies while they stream in; uploads are spooled before endpoints run.
+# Added before CORS so CORS wraps it and 413 responses carry CORS headers
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_body_size=settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + settings.UPLOAD_FORM_OVERHEAD_BYTES,
+    detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB} MB",
 )
 
 # Configure CORS
@@ -28,6 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include API routes
@@ -49,6 +90,12 @@ async def health_check():
     )
 
 
+@app.get("/metrics", tags=["System"])
+async def get_metrics():
+    """Metrics endpoint"""
+    return JSONResponse(content=metrics.snapshot())
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -3,13 +3,20 @@ from app.models.profile import (
     CompanyProfile, CompanyProfileBase, CompanyProfileCreate, 
     CompanyProfileRead, CompanyProfileUpdate, CompanyType, RevenueRange
 )
-from app.models.news import News, NewsBase, NewsCreate, NewsRead, NewsUpdate, TaxCategory
+from app.models.news import (
+    News, NewsBase, NewsCreate, NewsRead, NewsSearchResult, NewsUpdate, TaxCategory
+)
 from app.models.document import (
     Document, DocumentBase, DocumentCreate, DocumentRead, 
-    DocumentUpdate, DocumentType
+    DocumentUpdate, DocumentType, DocumentStatus, DocumentStatusRead
 )
 from app.models.chat import (
-    ChatMessage, ChatMessageBase, ChatMessageCreate, 
-    ChatMessageRead, MessageRole
+    ChatMessage, ChatMessageBase, ChatMessageCreate, ChatMessageRead, 
+    ChatSource, ChatSummary, LibraryAnswer, LibraryQuestion, MessageRole
 )
 from app.models.note import Note, NoteBase, NoteCreate, NoteRead, NoteUpdate
+from app.models.ingestion import IngestionJob, JobStatus
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.models.summary_cache import PersonalizedSummary
+from app.models.answer_cache import AnswerCacheEntry
+from app.models.lexical_index import LexicalIndexEntry
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class AnswerCacheEntry(SQLModel, table=True):
+    """Cached document answer model for database"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    document_id: int = Field(foreign_key="document.id", index=True)
+    document_version: datetime  # Document updated_at when the answer was generated
+    model: str
+    question: str
+    question_vector: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # float32 array
+    answer: str
+    cost_tokens: int = Field(default=0)  # Estimated prompt and completion tokens
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 
@@ -22,6 +23,11 @@ class ChatMessageBase(SQLModel):
 
 class ChatMessage(ChatMessageBase, table=True):
     """Chat message model for database"""
+    __table_args__ = (
+        # Chat history of a document in order
+        Index("ix_chatmessage_document_id_created_at_id", "document_id", "created_at", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -29,6 +35,14 @@ class ChatMessage(ChatMessageBase, table=True):
     document: "Document" = Relationship(back_populates="chat_messages")
 
 
+class ChatSummary(SQLModel, table=True):
+    """Rolling summary of a document chat's older messages for database"""
+    document_id: int = Field(foreign_key="document.id", primary_key=True)
+    summary: str
+    summarized_until_id: int  # ID of the newest message folded into the summary
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class ChatMessageCreate(ChatMessageBase):
     """Chat message creation model"""
     pass
@@ -38,3 +52,27 @@ class ChatMessageRead(ChatMessageBase):
     """Chat message read model"""
     id: int
     created_at: datetime
+
+
+class LibraryQuestion(SQLModel):
+    """Question asked across all of a user's documents"""
+    content: str
+    document_ids: Optional[List[int]] = None  # Limit the search to these documents
+
+
+class ChatSource(SQLModel):
+    """Document chunk an answer was based on"""
+    number: int  # As cited in the answer, e.g. [1]
+    document_id: int
+    title: str
+    page: Optional[int] = None
+    chunk_index: Optional[int] = None
+    score: float
+    cited: bool
+    excerpt: str
+
+
+class LibraryAnswer(SQLModel):
+    """Answer to a library question with its sources"""
+    answer: str
+    sources: List[ChatSource]
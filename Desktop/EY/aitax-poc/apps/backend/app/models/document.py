@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 
@@ -11,6 +12,14 @@ class DocumentType(str, Enum):
     TXT = "txt"
 
 
+class DocumentStatus(str, Enum):
+    """Document processing statuses"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class DocumentBase(SQLModel):
     """Base document model"""
     title: str
@@ -23,7 +32,14 @@ class DocumentBase(SQLModel):
 
 class Document(DocumentBase, table=True):
     """Document model for database"""
+    __table_args__ = (
+        # Documents of a user, newest first
+        Index("ix_document_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
+    status: DocumentStatus = Field(default=DocumentStatus.PENDING)
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 of the file
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -40,9 +56,19 @@ class DocumentCreate(DocumentBase):
 class DocumentRead(DocumentBase):
     """Document read model"""
     id: int
+    status: DocumentStatus
     created_at: datetime
 
 
+class DocumentStatusRead(SQLModel):
+    """Document processing status model"""
+    document_id: int
+    status: DocumentStatus
+    attempts: int = 0
+    last_error: Optional[str] = None
+    updated_at: datetime
+
+
 class DocumentUpdate(SQLModel):
     """Document update model"""
     title: Optional[str] = None
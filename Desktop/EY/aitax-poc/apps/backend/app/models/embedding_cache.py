@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class EmbeddingCacheEntry(SQLModel, table=True):
+    """Cached embedding vector model for database"""
+    embedding_model: str = Field(primary_key=True)
+    chunk_hash: str = Field(primary_key=True)  # SHA-256 of the normalized chunk text
+    vector: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # float32 array
+    created_at: datetime = Field(default_factory=datetime.utcnow)
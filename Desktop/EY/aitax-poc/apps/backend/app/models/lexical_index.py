@@ -0,0 +1,11 @@
+from datetime import datetime
+
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class LexicalIndexEntry(SQLModel, table=True):
+    """Per-document BM25 index model for database"""
+    document_id: int = Field(foreign_key="document.id", primary_key=True)
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # zlib-compressed JSON
+    created_at: datetime = Field(default_factory=datetime.utcnow)
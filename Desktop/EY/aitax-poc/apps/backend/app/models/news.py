@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 
@@ -28,6 +29,11 @@ class NewsBase(SQLModel):
 
 class News(NewsBase, table=True):
     """News model for database"""
+    __table_args__ = (
+        # Newest news first
+        Index("ix_news_published_date_id", "published_date", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -55,3 +61,16 @@ class NewsUpdate(SQLModel):
     category: Optional[TaxCategory] = None
     source_url: Optional[str] = None
     published_date: Optional[datetime] = None
+
+
+class NewsSearchResult(SQLModel):
+    """News search hit with highlighted excerpts, without the full content"""
+    id: int
+    title: str
+    summary: str
+    category: TaxCategory
+    source_url: Optional[str] = None
+    published_date: datetime
+    rank: float  # Higher is a better match
+    title_highlight: str  # HTML-escaped, matched words in <mark>
+    snippet: str  # HTML-escaped excerpt of the content around the first match
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 
@@ -14,6 +15,13 @@ class NoteBase(SQLModel):
 
 class Note(NoteBase, table=True):
     """Note model for database"""
+    __table_args__ = (
+        # Notes of a user, optionally of one news item or document, newest first
+        Index("ix_note_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_note_user_id_news_id_created_at_id", "user_id", "news_id", "created_at", "id"),
+        Index("ix_note_user_id_document_id_created_at_id", "user_id", "document_id", "created_at", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Optional
 
 from pydantic import Field, validator
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Relationship
 
 
@@ -43,6 +44,11 @@ class CompanyProfileBase(SQLModel):
 
 class CompanyProfile(CompanyProfileBase, table=True):
     """Company profile model for database"""
+    __table_args__ = (
+        # One profile per user
+        Index("ix_companyprofile_user_id", "user_id", unique=True),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class PersonalizedSummary(SQLModel, table=True):
+    """Cached personalized news summary model for database"""
+    news_id: int = Field(foreign_key="news.id", primary_key=True)
+    profile_fingerprint: str = Field(primary_key=True, index=True)  # SHA-256 of the prompt's profile fields
+    model: str = Field(primary_key=True)
+    prompt_version: str = Field(primary_key=True)
+    summary: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -16,6 +16,7 @@ class User(UserBase, table=True):
     """User model for database"""
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
+    last_login_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -1,55 +1,41 @@
-from typing import Dict, List
+import asyncio
+import re
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document as LangchainDocument
 
 from app.core.config import settings
-from app.models.document import Document
+from app.core.metrics import metrics
+from app.models.chat import ChatSource, LibraryAnswer
+from app.models.document import Document, DocumentStatus
 from app.models.news import News
 from app.models.profile import CompanyProfile
+from app.services.answer_cache import find_cached_answer, store_answer
+from app.services.chat_memory import ChatMemory, condense_question, format_history
+from app.services.chunking import count_tokens
+from app.services.clients import clients
+from app.services.context_packing import pack_context, pack_sources, truncate_to_tokens
+from app.services.embedding_cache import CachedEmbeddings, normalize_text
+from app.services.lexical_index import is_identifier_query, reciprocal_rank_fusion
+from app.services.model_router import ModelTask, run_prompt, stream_prompt
+from app.services.prompts import DOCUMENT_ANSWER, LIBRARY_ANSWER, PERSONALIZED_SUMMARY
+from app.services.single_flight import SingleFlight
+from app.services.vector_cache import vector_cache
+from app.services.vector_store import query_partition
 
+lexical_only_retrievals = metrics.counter("retrieval_lexical_only_total", "Identifier lookups retrieved without embedding")
+hybrid_retrievals = metrics.counter("retrieval_hybrid_total", "Retrievals fusing vector and BM25 rankings")
+library_answers = metrics.counter("library_answers_total", "Questions answered across a user's documents")
+library_documents = metrics.gauge("library_answer_documents", "Documents among the sources of the last library answer")
 
-# Initialize OpenAI models
-embeddings = OpenAIEmbeddings(model=settings.EMBEDDING_MODEL)
-llm = ChatOpenAI(model=settings.CHAT_MODEL)
+# Identical questions asked at the same time share one embedding and one retrieval
+embedding_flight = SingleFlight("question_embedding")
+retrieval_flight = SingleFlight("retrieval")
 
 
 async def generate_personalized_summary(news: News, profile: CompanyProfile) -> str:
     """Generate a personalized summary of why a news item is relevant to a user"""
-    # Create prompt template
-    prompt = ChatPromptTemplate.from_template(
-        """You are an AI tax advisor for a company with the following profile:
-        
-        Company Name: {company_name}
-        NIP (Tax ID): {nip}
-        VAT ID: {vat_id}
-        Industry: {industry}
-        Company Type: {company_type}
-        PKD Code: {pkd_code}
-        
-        Tax Information:
-        - Uses reduced CIT rate (9%): {cit_rate_reduced}
-        - Uses Estonian CIT: {estonian_cit}
-        - Revenue Range: {revenue_range}
-        - Has related party transactions > 10M PLN: {related_party_transactions}
-        - Uses R&D tax relief: {rd_relief}
-        - Employee Count: {employee_count}
-        - Annual Revenue: {annual_revenue} PLN
-        
-        I want you to explain why the following tax news is relevant to this specific company:
-        
-        Title: {news_title}
-        Category: {news_category}
-        Content: {news_content}
-        
-        Provide a personalized explanation (2-3 paragraphs) of why this news matters to this specific company, 
-        considering their profile, tax situation, and business characteristics. Be specific and actionable.
-        """
-    )
-    
     # Prepare input data
     input_data = {
         "company_name": profile.name,
@@ -67,68 +53,261 @@ async def generate_personalized_summary(news: News, profile: CompanyProfile) ->
         "annual_revenue": profile.annual_revenue or "Not specified",
         "news_title": news.title,
         "news_category": news.category.value,
-        "news_content": news.content
+        "news_content": truncate_to_tokens(news.content, settings.NEWS_CONTENT_MAX_TOKENS)
     }
     
-    # Create and run chain
-    chain = prompt | llm | StrOutputParser()
-    result = await chain.ainvoke(input_data)
+    # Run the prompt on the model tier routed for summaries
+    result = await run_prompt(ModelTask.PERSONALIZED_SUMMARY, PERSONALIZED_SUMMARY, input_data)
     
     return result
 
 
-async def generate_document_answer(document: Document, question: str) -> str:
-    """Generate an answer to a question about a document using RAG"""
-    # Get the ChromaDB collection for the document
-    collection_name = f"{settings.CHROMA_COLLECTION_PREFIX}__docs__v1"
+async def embed_question(question: str) -> List[float]:
+    """Embed a question, reusing the vector of an identical earlier or in-flight question"""
+    embeddings = CachedEmbeddings(clients.embedding_service, clients.embedding_model_key)
+    key = (clients.embedding_model_key, normalize_text(question))
+    return await embedding_flight.do(key, lambda: embeddings.aembed_query(question))
+
+
+async def retrieve_document_chunks(
+    document: Document,
+    question: str,
+    k: Optional[int] = None,
+    query_vector: Optional[List[float]] = None,
+) -> List[LangchainDocument]:
+    """Retrieve the chunks of a document most relevant to a question
+    
+    Identical retrievals in flight are shared; the query vector is derived from
+    the question, so it is not part of the key.
+    """
+    k = k or settings.DOCUMENT_RETRIEVAL_K
+    key = (document.id, document.updated_at, document.status, question, k)
+    return await retrieval_flight.do(
+        key, lambda: _retrieve_document_chunks(document, question, k, query_vector)
+    )
+
+
+async def _retrieve_document_chunks(
+    document: Document,
+    question: str,
+    k: int,
+    query_vector: Optional[List[float]],
+) -> List[LangchainDocument]:
+    # Fully processed documents are searched in-process once their vectors are cached
+    if document.status == DocumentStatus.READY:
+        cached_document = await vector_cache.get_or_load(document.id, document.updated_at, document.user_id)
+        lexical_ranking = cached_document.lexical_rank(question, settings.HYBRID_CANDIDATES)
+        
+        # Identifier lookups such as "art. 15e" or a NIP are answered by exact term matches
+        if lexical_ranking and is_identifier_query(question):
+            lexical_only_retrievals.inc()
+            return cached_document.documents(lexical_ranking[:k])
+        
+        if query_vector is None:
+            query_vector = await embed_question(question)
+        vector_ranking = cached_document.vector_rank(query_vector, settings.HYBRID_CANDIDATES)
+        
+        hybrid_retrievals.inc()
+        ranking = reciprocal_rank_fusion([vector_ranking, lexical_ranking])
+        return cached_document.documents(ranking[:k])
     
+    if query_vector is None:
+        query_vector = await embed_question(question)
+    results = await asyncio.to_thread(
+        query_partition, document.user_id, query_vector, k, {"document_id": str(document.id)}
+    )
+    return [chunk for chunk, _ in results]
+
+
+def document_answer_error(error: Exception) -> str:
+    """Fallback answer shown when a question could not be processed"""
+    return f"I'm sorry, I couldn't process your question about this document. Error: {str(error)}"
+
+
+def _answer_inputs(memory: ChatMemory, context: str, question: str) -> Dict[str, str]:
+    """Fill the answer prompt with the chat memory, packed context and question"""
+    return {
+        "summary": memory.summary or "(none)",
+        "history": format_history(memory.messages) or "(none)",
+        "context": context,
+        "question": question
+    }
+
+
+def _answer_cost(inputs: Dict[str, str], answer: str) -> int:
+    """Estimate the prompt and completion tokens spent on an answer"""
+    texts = [*inputs.values(), answer]
+    return DOCUMENT_ANSWER.overhead_tokens + sum(count_tokens(text, settings.CHAT_MODEL) for text in texts)
+
+
+async def _find_cached_answer(
+    document: Document, question: str
+) -> Tuple[Optional[List[float]], Optional[str]]:
+    """Embed a question and look up the answer to a near-identical earlier one"""
+    # Embeddings barely tell "art. 15e" from "art. 15f", so identifier lookups skip the cache
+    if is_identifier_query(question):
+        return None, None
+    
+    query_vector = await embed_question(question)
+    return query_vector, await asyncio.to_thread(find_cached_answer, document, query_vector)
+
+
+async def _store_answer(
+    document: Document,
+    question: str,
+    query_vector: Optional[List[float]],
+    inputs: Dict[str, str],
+    answer: str,
+) -> None:
+    if query_vector is not None:
+        cost = _answer_cost(inputs, answer)
+        await asyncio.to_thread(store_answer, document, question, query_vector, answer, cost)
+
+
+async def generate_document_answer(
+    document: Document, question: str, memory: Optional[ChatMemory] = None
+) -> str:
+    """Generate an answer to a question about a document using RAG"""
     try:
-        # Load the vector store
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=embeddings,
-            client_settings={"host": settings.CHROMA_HOST, "port": settings.CHROMA_PORT}
-        )
+        # Follow-ups are retrieved and cached as standalone questions
+        memory = memory or ChatMemory("", [])
+        standalone_question = await condense_question(memory, question)
         
-        # Create retriever with document filter
-        retriever = vectorstore.as_retriever(
-            search_kwargs={
-                "k": 5,
-                "filter": {"document_id": str(document.id)}
-            }
-        )
+        # Near-identical questions reuse an earlier answer
+        query_vector, cached_answer = await _find_cached_answer(document, standalone_question)
+        if cached_answer is not None:
+            return cached_answer
         
-        # Create prompt template
-        prompt = ChatPromptTemplate.from_template(
-            """You are an AI assistant helping with tax document analysis.
-            
-            Use the following context to answer the question. If you don't know the answer based on the context, 
-            say "I don't have enough information to answer this question based on the document."
-            
-            Context:
-            {context}
-            
-            Question: {question}
-            
-            Answer:
-            """
+        # Retrieve the most relevant chunks
+        docs = await retrieve_document_chunks(document, standalone_question, query_vector=query_vector)
+        inputs = _answer_inputs(memory, pack_context(docs), question)
+        
+        # Simple questions go to the fast model tier, falling back when it is unsure
+        answer = await run_prompt(
+            ModelTask.DOCUMENT_ANSWER, DOCUMENT_ANSWER, inputs, question=standalone_question
         )
         
-        # Define RAG chain
-        def format_docs(docs):
-            return "\n\n".join([doc.page_content for doc in docs])
+        await _store_answer(document, standalone_question, query_vector, inputs, answer)
+        return answer
+        
+    except Exception as e:
+        # Fallback response if something goes wrong
+        return document_answer_error(e)
+
+
+async def stream_document_answer(
+    document: Document, question: str, memory: Optional[ChatMemory] = None
+) -> AsyncIterator[str]:
+    """Stream an answer to a question about a document token by token"""
+    memory = memory or ChatMemory("", [])
+    standalone_question = await condense_question(memory, question)
+    
+    query_vector, cached_answer = await _find_cached_answer(document, standalone_question)
+    if cached_answer is not None:
+        yield cached_answer
+        return
+    
+    docs = await retrieve_document_chunks(document, standalone_question, query_vector=query_vector)
+    inputs = _answer_inputs(memory, pack_context(docs), question)
+    
+    tokens: List[str] = []
+    answer_stream = stream_prompt(
+        ModelTask.DOCUMENT_ANSWER, DOCUMENT_ANSWER, inputs, question=standalone_question
+    )
+    async for token in answer_stream:
+        if token:
+            tokens.append(token)
+            yield token
+    
+    # Only answers streamed to completion are cached
+    await _store_answer(document, standalone_question, query_vector, inputs, "".join(tokens))
+
+
+# Citations such as [1] or [2][3] in library answers
+_CITATION_PATTERN = re.compile(r"\[(\d+)\]")
+
+SOURCE_EXCERPT_CHARS = 300
+
+
+async def retrieve_library_chunks(
+    user_id: int,
+    question: str,
+    titles: Dict[int, str],
+    k: Optional[int] = None,
+) -> List[Tuple[LangchainDocument, float]]:
+    """Retrieve the chunks most relevant to a question from several of a user's documents
+    
+    The user's partition is searched once, restricted to the documents in titles,
+    so the top k is merged across them. Each document contributes at most
+    LIBRARY_MAX_CHUNKS_PER_DOCUMENT chunks so one long filing cannot crowd out the rest.
+    """
+    k = k or settings.LIBRARY_RETRIEVAL_K
+    query_vector = await embed_question(question)
+    # Filtering in the query keeps candidates of selected documents from being cut
+    # off by closer chunks of the rest of a large library
+    where = {"$and": [
+        {"user_id": str(user_id)},
+        {"document_id": {"$in": [str(document_id) for document_id in titles]}}
+    ]}
+    results = await asyncio.to_thread(
+        query_partition, user_id, query_vector, settings.LIBRARY_CANDIDATES, where
+    )
+    
+    selected: List[Tuple[LangchainDocument, float]] = []
+    per_document: Counter = Counter()
+    for chunk, score in results:
+        document_id = int(chunk.metadata.get("document_id", 0))
+        if document_id not in titles or per_document[document_id] >= settings.LIBRARY_MAX_CHUNKS_PER_DOCUMENT:
+            continue
         
-        rag_chain = (
-            {"context": retriever | format_docs, "question": RunnablePassthrough()}
-            | prompt
-            | llm
-            | StrOutputParser()
+        # Titles may have been renamed since the chunk was stored
+        chunk.metadata["title"] = titles[document_id]
+        per_document[document_id] += 1
+        selected.append((chunk, score))
+        if len(selected) == k:
+            break
+    
+    return selected
+
+
+async def generate_library_answer(user_id: int, documents: List[Document], question: str) -> LibraryAnswer:
+    """Answer a question from several of a user's documents, with the sources used"""
+    try:
+        results = await retrieve_library_chunks(
+            user_id, question, {document.id: document.title for document in documents}
         )
+        scores = {id(chunk): score for chunk, score in results}
+        context, packed = pack_sources([chunk for chunk, _ in results])
         
-        # Run the chain
-        answer = await rag_chain.ainvoke(question)
-        return answer
+        answer = await run_prompt(
+            ModelTask.LIBRARY_ANSWER,
+            LIBRARY_ANSWER,
+            {"context": context or "(no matching sources)", "question": question},
+            question=question
+        )
         
     except Exception as e:
         # Fallback response if something goes wrong
-        return f"I'm sorry, I couldn't process your question about this document. Error: {str(e)}"
+        return LibraryAnswer(
+            answer=f"I'm sorry, I couldn't process your question about your documents. Error: {str(e)}",
+            sources=[]
+        )
+    
+    cited = {int(number) for number in _CITATION_PATTERN.findall(answer)}
+    sources = [
+        ChatSource(
+            number=number,
+            document_id=int(chunk.metadata["document_id"]),
+            title=chunk.metadata["title"],
+            page=chunk.metadata.get("page"),
+            chunk_index=chunk.metadata.get("chunk_index"),
+            score=round(scores[id(chunk)], 4),
+            cited=number in cited,
+            excerpt=chunk.page_content.strip()[:SOURCE_EXCERPT_CHARS]
+        )
+        for number, chunk in enumerate(packed, start=1)
+    ]
+    
+    library_answers.inc()
+    library_documents.set(len({source.document_id for source in sources}))
+    return LibraryAnswer(answer=answer, sources=sources)
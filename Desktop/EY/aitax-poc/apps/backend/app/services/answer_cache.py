@@ -0,0 +1,109 @@
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.answer_cache import AnswerCacheEntry
+from app.models.document import Document, DocumentStatus
+from app.services.clients import clients
+from app.services.embedding_cache import pack_vector, unpack_vector
+
+cache_hits = metrics.counter("answer_cache_hits", "Document questions answered from the cache")
+cache_misses = metrics.counter("answer_cache_misses", "Document questions sent to the model")
+cache_hit_rate = metrics.gauge("answer_cache_hit_rate", "Share of document questions answered from the cache")
+saved_tokens = metrics.counter("answer_cache_saved_tokens_total", "Estimated model tokens saved by cache hits")
+similarity_threshold = metrics.gauge("answer_cache_similarity_threshold", "Question similarity needed for a cache hit")
+last_hit_similarity = metrics.gauge("answer_cache_last_hit_similarity", "Similarity of the last cache hit")
+
+similarity_threshold.set(settings.ANSWER_CACHE_SIMILARITY_THRESHOLD)
+
+
+def _cacheable(document: Document) -> bool:
+    # Answers over a partially indexed document would go stale as chunks arrive
+    return settings.ANSWER_CACHE_ENABLED and document.status == DocumentStatus.READY
+
+
+def _record_lookup(hit: bool) -> None:
+    (cache_hits if hit else cache_misses).inc()
+    cache_hit_rate.set(cache_hits.value / (cache_hits.value + cache_misses.value))
+
+
+def _current_entries(session: Session, document: Document) -> List[AnswerCacheEntry]:
+    """Entries for the current version of a document, newest first"""
+    return session.exec(
+        select(AnswerCacheEntry)
+        .where(
+            AnswerCacheEntry.document_id == document.id,
+            AnswerCacheEntry.document_version == document.updated_at,
+            AnswerCacheEntry.model == clients.chat_model_key
+        )
+        .order_by(AnswerCacheEntry.created_at.desc())
+    ).all()
+
+
+def find_cached_answer(document: Document, question_vector: List[float]) -> Optional[str]:
+    """Get the cached answer of the most similar earlier question above the threshold"""
+    if not _cacheable(document):
+        return None
+
+    with Session(engine) as session:
+        entries = _current_entries(session, document)
+
+    if not entries:
+        _record_lookup(False)
+        return None
+
+    matrix = np.array([unpack_vector(entry.question_vector) for entry in entries], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+    query = np.array(question_vector, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1
+
+    scores = matrix @ query
+    best = int(np.argmax(scores))
+    if scores[best] < settings.ANSWER_CACHE_SIMILARITY_THRESHOLD:
+        _record_lookup(False)
+        return None
+
+    _record_lookup(True)
+    last_hit_similarity.set(float(scores[best]))
+    saved_tokens.inc(entries[best].cost_tokens)
+    return entries[best].answer
+
+
+def store_answer(
+    document: Document,
+    question: str,
+    question_vector: List[float],
+    answer: str,
+    cost_tokens: int,
+) -> None:
+    """Cache an answer, dropping the oldest entries beyond the per-document limit"""
+    if not _cacheable(document):
+        return
+
+    with Session(engine) as session:
+        session.add(AnswerCacheEntry(
+            document_id=document.id,
+            document_version=document.updated_at,
+            model=clients.chat_model_key,
+            question=question,
+            question_vector=pack_vector(question_vector),
+            answer=answer,
+            cost_tokens=cost_tokens
+        ))
+        session.flush()
+
+        stale = _current_entries(session, document)[settings.ANSWER_CACHE_MAX_ENTRIES_PER_DOCUMENT:]
+        for entry in stale:
+            session.delete(entry)
+
+        session.commit()
+
+
+def invalidate_document_answers(session: Session, document_id: int) -> None:
+    """Delete cached answers of a document (caller commits)"""
+    session.execute(delete(AnswerCacheEntry).where(AnswerCacheEntry.document_id == document_id))
@@ -0,0 +1,194 @@
+import asyncio
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+from weakref import WeakValueDictionary
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.metrics import metrics
+from app.models.chat import ChatMessage, ChatSummary, MessageRole
+from app.services.chunking import count_tokens
+from app.services.context_packing import truncate_to_tokens
+from app.services.model_router import ModelTask, run_prompt
+from app.services.prompts import CHAT_SUMMARY, CONDENSE_QUESTION
+
+summary_updates = metrics.counter("chat_summary_updates_total", "Rolling chat summaries regenerated")
+summarized_messages = metrics.counter("chat_summary_messages_total", "Chat messages folded into rolling summaries")
+
+# Transcript tokens sent to the model per summary update
+SUMMARY_BATCH_TOKENS = settings.CHAT_HISTORY_MAX_TOKENS * 2
+
+_ROLE_LABELS = {MessageRole.USER: "User", MessageRole.ASSISTANT: "Assistant", MessageRole.SYSTEM: "System"}
+
+# Locks of chats whose summary is being updated, dropped once no update holds them
+_summary_locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+
+class ChatMemory(NamedTuple):
+    """What the model sees of a document chat: a summary plus the most recent turns"""
+    summary: str
+    messages: List[ChatMessage]
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.summary and not self.messages
+
+
+def _format_message(message: ChatMessage) -> str:
+    return f"{_ROLE_LABELS[message.role]}: {message.content}"
+
+
+def format_history(messages: List[ChatMessage], max_tokens: Optional[int] = None) -> str:
+    """Format recent messages, keeping the newest ones within a token budget"""
+    max_tokens = max_tokens or settings.CHAT_HISTORY_MAX_TOKENS
+    lines: List[str] = []
+    used = 0
+
+    for message in reversed(messages):
+        line = _format_message(message)
+        tokens = count_tokens(line, settings.CHAT_MODEL)
+        if used + tokens > max_tokens:
+            # Keep the start of the message that crosses the budget, then stop
+            lines.append(truncate_to_tokens(line, max_tokens - used))
+            break
+        lines.append(line)
+        used += tokens
+
+    return "\n".join(reversed([line for line in lines if line]))
+
+
+async def _recent_messages(session: AsyncSession, document_id: int, before_id: Optional[int]) -> List[ChatMessage]:
+    """The last CHAT_MEMORY_TURNS question and answer pairs, oldest first"""
+    query = select(ChatMessage).where(ChatMessage.document_id == document_id)
+    if before_id is not None:
+        query = query.where(ChatMessage.id < before_id)
+
+    messages = (await session.exec(
+        query.order_by(ChatMessage.id.desc()).limit(2 * settings.CHAT_MEMORY_TURNS)
+    )).all()
+    return list(reversed(messages))
+
+
+def _summary_lock(document_id: int) -> asyncio.Lock:
+    lock = _summary_locks.get(document_id)
+    if lock is None:
+        lock = _summary_locks[document_id] = asyncio.Lock()
+    return lock
+
+
+def _batches(messages: List[ChatMessage], max_tokens: int) -> List[List[ChatMessage]]:
+    """Split messages, oldest first, into consecutive batches within a token budget"""
+    batches: List[List[ChatMessage]] = []
+    batch: List[ChatMessage] = []
+    used = 0
+
+    for message in messages:
+        tokens = count_tokens(_format_message(message), settings.CHAT_MODEL)
+        if batch and used + tokens > max_tokens:
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(message)
+        used += tokens
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _summarize(summary: str, messages: List[ChatMessage]) -> str:
+    """Fold a batch of messages into a summary with the chat model"""
+    # Only a single message longer than the budget is cut short
+    transcript = format_history(messages, SUMMARY_BATCH_TOKENS)
+    result = await run_prompt(ModelTask.CHAT_SUMMARY, CHAT_SUMMARY, {
+        "summary": summary or "(none)",
+        "messages": transcript,
+        "max_words": settings.CHAT_SUMMARY_MAX_TOKENS * 3 // 4
+    })
+    return truncate_to_tokens(result.strip(), settings.CHAT_SUMMARY_MAX_TOKENS)
+
+
+async def _store_summary(document_id: int, summary: str, summarized_until_id: int) -> ChatSummary:
+    """Save a chat's rolling summary and the last message folded into it"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        chat_summary = await session.get(ChatSummary, document_id) or ChatSummary(
+            document_id=document_id, summary="", summarized_until_id=0
+        )
+        chat_summary.summary = summary
+        chat_summary.summarized_until_id = summarized_until_id
+        chat_summary.updated_at = datetime.utcnow()
+        session.add(chat_summary)
+        await session.commit()
+        await session.refresh(chat_summary)
+        return chat_summary
+
+
+async def update_chat_summary(document_id: int, before_id: Optional[int] = None) -> Optional[ChatSummary]:
+    """Fold messages that fell out of the recent window into the chat's rolling summary
+
+    Only messages not yet summarized are sent to the model, so each call costs at
+    most a turn or two once the summary has caught up. A longer backlog is folded
+    in batches that each fit the prompt, saving progress after every batch.
+    """
+    async with _summary_lock(document_id):
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            recent = await _recent_messages(session, document_id, before_id)
+            chat_summary = await session.get(ChatSummary, document_id)
+            if not recent:
+                return chat_summary
+
+            summarized_until_id = chat_summary.summarized_until_id if chat_summary else 0
+            pending = (await session.exec(
+                select(ChatMessage)
+                .where(
+                    ChatMessage.document_id == document_id,
+                    ChatMessage.id > summarized_until_id,
+                    ChatMessage.id < recent[0].id
+                )
+                .order_by(ChatMessage.id)
+            )).all()
+            if not pending:
+                return chat_summary
+
+            summary = chat_summary.summary if chat_summary else ""
+
+        for batch in _batches(pending, SUMMARY_BATCH_TOKENS):
+            summary = await _summarize(summary, batch)
+            chat_summary = await _store_summary(document_id, summary, batch[-1].id)
+
+            summary_updates.inc()
+            summarized_messages.inc(len(batch))
+
+        return chat_summary
+
+
+async def load_chat_memory(document_id: int, before_id: Optional[int] = None) -> ChatMemory:
+    """Load the summary and recent turns of a document chat, as seen before a given message"""
+    # Normally a no-op, since the summary is brought up to date after every answer
+    chat_summary = await update_chat_summary(document_id, before_id)
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        messages = await _recent_messages(session, document_id, before_id)
+
+    return ChatMemory(chat_summary.summary if chat_summary else "", messages)
+
+
+async def condense_question(memory: ChatMemory, question: str) -> str:
+    """Rewrite a follow-up question so it can be retrieved and cached on its own"""
+    if memory.is_empty:
+        return question
+
+    standalone = await run_prompt(ModelTask.CONDENSE_QUESTION, CONDENSE_QUESTION, {
+        "summary": memory.summary or "(none)",
+        "history": format_history(memory.messages),
+        "question": question
+    })
+    return standalone.strip() or question
+
+
+def delete_chat_summary(session: Session, document_id: int) -> None:
+    """Delete the rolling summary of a document chat (caller commits)"""
+    session.execute(delete(ChatSummary).where(ChatSummary.document_id == document_id))
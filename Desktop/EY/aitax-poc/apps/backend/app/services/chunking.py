@@ -0,0 +1,99 @@
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Iterator, List, Optional, TypeVar
+
+import tiktoken
+from langchain_core.documents import Document as LangchainDocument
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: Optional[str] = None) -> tiktoken.Encoding:
+    """Get the tokenizer used by the embedding model"""
+    try:
+        return tiktoken.encoding_for_model(model_name or settings.EMBEDDING_MODEL)
+    except KeyError:
+        # Unknown model names fall back to the encoding used by current OpenAI models
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Count the number of tokens in a text"""
+    return len(get_encoding(model_name).encode(text, disallowed_special=()))
+
+
+def _word_boundary(
+    tokens: List[int], index: int, lower: int, encoding: tiktoken.Encoding
+) -> int:
+    """Move a split index back to the nearest token that starts a new word"""
+    for i in range(index, lower, -1):
+        if encoding.decode_single_token_bytes(tokens[i])[:1].isspace():
+            return i
+    return index
+
+
+def split_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+) -> Iterator[str]:
+    """Split text into overlapping windows of at most chunk_size tokens"""
+    chunk_size = chunk_size or settings.CHUNK_SIZE_TOKENS
+    if chunk_overlap is None:
+        chunk_overlap = settings.CHUNK_OVERLAP_TOKENS
+    if chunk_overlap >= chunk_size:
+        raise ValueError("Chunk overlap must be smaller than chunk size")
+
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+
+    start = 0
+    while start < len(tokens):
+        end = min(start + chunk_size, len(tokens))
+        if end < len(tokens):
+            # Prefer to end the chunk between words rather than inside one
+            end = _word_boundary(tokens, end, start + chunk_size // 2, encoding)
+
+        yield encoding.decode(tokens[start:end])
+
+        if end >= len(tokens):
+            break
+
+        next_start = max(end - chunk_overlap, start + 1)
+        start = _word_boundary(tokens, next_start, start, encoding)
+
+
+async def chunk_documents(
+    pages: AsyncIterable[LangchainDocument],
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+) -> AsyncIterator[LangchainDocument]:
+    """Split a stream of pages into token-sized chunks that never span two pages"""
+    chunk_index = 0
+
+    async for page in pages:
+        for text in split_text(page.page_content, chunk_size, chunk_overlap):
+            if not text.strip():
+                continue
+
+            yield LangchainDocument(
+                page_content=text,
+                metadata={**page.metadata, "chunk_index": chunk_index}
+            )
+            chunk_index += 1
+
+
+async def batched(items: AsyncIterable[T], size: int) -> AsyncIterator[List[T]]:
+    """Group an async stream into lists of at most size items"""
+    batch: List[T] = []
+
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
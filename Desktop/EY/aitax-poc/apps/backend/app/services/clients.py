@@ -0,0 +1,177 @@
+import zlib
+from typing import Dict, Optional
+
+import chromadb
+import httpx
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from app.core.config import settings
+from app.services.embeddings import EmbeddingService
+from app.services.providers import ModelProvider, create_provider
+
+
+def get_collection_name() -> str:
+    """Get the name of the shared document chunk collection"""
+    return f"{settings.CHROMA_COLLECTION_PREFIX}__docs__v1"
+
+
+def get_partition_name(user_id: int) -> str:
+    """Get the name of the collection holding a user's document chunks
+
+    Users are spread over VECTOR_PARTITION_SHARDS collections by a stable hash,
+    or get a collection of their own when it is 0.
+    """
+    if settings.VECTOR_PARTITION_SHARDS <= 0:
+        return f"{get_collection_name()}__user{user_id}"
+    shard = zlib.crc32(str(user_id).encode("utf-8")) % settings.VECTOR_PARTITION_SHARDS
+    return f"{get_collection_name()}__shard{shard:03d}"
+
+
+class ClientRegistry:
+    """Long-lived clients shared by the whole process, created once and closed at shutdown"""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self) -> None:
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._chroma: Optional[chromadb.ClientAPI] = None
+        self._provider: Optional[ModelProvider] = None
+        self._embeddings: Optional[Embeddings] = None
+        self._embedding_service: Optional[EmbeddingService] = None
+        self._llm: Optional[BaseChatModel] = None
+        self._fast_llm: Optional[BaseChatModel] = None
+        self._vectorstore: Optional[Chroma] = None
+        self._partitions: Dict[str, chromadb.Collection] = {}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Pooled HTTP client for synchronous model API calls"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=self._limits(),
+                timeout=settings.HTTP_TIMEOUT_SECONDS
+            )
+        return self._http_client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client for asynchronous model API calls"""
+        if self._async_http_client is None:
+            self._async_http_client = httpx.AsyncClient(
+                limits=self._limits(),
+                timeout=settings.HTTP_TIMEOUT_SECONDS
+            )
+        return self._async_http_client
+
+    @property
+    def chroma(self) -> chromadb.ClientAPI:
+        """Chroma HTTP client; its requests session keeps connections alive"""
+        if self._chroma is None:
+            self._chroma = chromadb.HttpClient(
+                host=settings.CHROMA_HOST,
+                port=settings.CHROMA_PORT
+            )
+        return self._chroma
+
+    @property
+    def provider(self) -> ModelProvider:
+        """Model provider selected by MODEL_PROVIDER"""
+        if self._provider is None:
+            self._provider = create_provider(
+                settings.MODEL_PROVIDER, self.http_client, self.async_http_client
+            )
+        return self._provider
+
+    @property
+    def chat_model_key(self) -> str:
+        """Chat model name used in cache keys"""
+        return self.provider.model_key(settings.CHAT_MODEL)
+
+    @property
+    def embedding_model_key(self) -> str:
+        """Embedding model name used in cache keys"""
+        return self.provider.model_key(settings.EMBEDDING_MODEL)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Raw embeddings client of the provider"""
+        if self._embeddings is None:
+            self._embeddings = self.provider.embeddings(settings.EMBEDDING_MODEL)
+        return self._embeddings
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Batched, rate-limit-aware embedding service shared by every caller"""
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService(self.embeddings)
+        return self._embedding_service
+
+    @property
+    def llm(self) -> BaseChatModel:
+        """Chat model client of the provider (strong tier)"""
+        if self._llm is None:
+            self._llm = self.provider.chat_model(settings.CHAT_MODEL)
+        return self._llm
+
+    @property
+    def fast_llm(self) -> BaseChatModel:
+        """Cheaper, faster chat model client of the provider (fast tier)"""
+        if self._fast_llm is None:
+            self._fast_llm = self.provider.chat_model(settings.FAST_CHAT_MODEL)
+        return self._fast_llm
+
+    @property
+    def vectorstore(self) -> Chroma:
+        """Vector store holding document chunks"""
+        if self._vectorstore is None:
+            self._vectorstore = Chroma(
+                client=self.chroma,
+                collection_name=get_collection_name(),
+                embedding_function=self.embedding_service
+            )
+        return self._vectorstore
+
+    def partition(self, user_id: int) -> chromadb.Collection:
+        """Collection holding a user's document chunks, created on first use"""
+        name = get_partition_name(user_id)
+        if name not in self._partitions:
+            # Cosine distances let scores from different documents be compared directly
+            self._partitions[name] = self.chroma.get_or_create_collection(
+                name, metadata={"hnsw:space": "cosine"}
+            )
+        return self._partitions[name]
+
+    def startup(self) -> None:
+        """Create every client up front so no request pays the setup cost"""
+        self.llm
+        self.fast_llm
+        self.embedding_service
+        try:
+            self.vectorstore
+        except Exception as e:
+            # Chroma may still be starting; the client is created on first use instead
+            print(f"Could not connect to Chroma at startup: {str(e)}")
+
+    async def shutdown(self) -> None:
+        """Close pooled connections and drop every client"""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+
+        self._reset()
+
+
+# Create client registry instance
+clients = ClientRegistry()
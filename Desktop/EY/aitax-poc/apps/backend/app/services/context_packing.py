@@ -0,0 +1,154 @@
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document as LangchainDocument
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.chunking import count_tokens, get_encoding
+from app.services.embedding_cache import normalize_text
+
+context_tokens = metrics.gauge("prompt_context_tokens", "Tokens of the last packed prompt context")
+dropped_chunks = metrics.counter("prompt_context_dropped_chunks_total", "Retrieved chunks left out of the prompt")
+deduplicated_chunks = metrics.counter("prompt_context_deduplicated_chunks_total", "Retrieved chunks removed as duplicates")
+
+CHUNK_SEPARATOR = "\n\n"
+
+# Shortest shared text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 32
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cut a text down to at most max_tokens tokens"""
+    encoding = get_encoding(model_name or settings.CHAT_MODEL)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def _overlap_start(first: str, second: str) -> int:
+    """Find where a suffix of first that is also a prefix of second begins, or -1"""
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return -1
+
+    start = first.find(probe)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return start
+        start = first.find(probe, start + 1)
+
+    return -1
+
+
+def _trim_overlap(packed: str, text: str) -> str:
+    """Drop the part of a chunk that repeats the start or end of an already packed chunk"""
+    start = _overlap_start(packed, text)
+    if start != -1:
+        text = text[len(packed) - start:]
+
+    start = _overlap_start(text, packed)
+    if start != -1:
+        text = text[:start]
+
+    return text
+
+
+def source_label(chunk: LangchainDocument) -> str:
+    """Name the document and page a chunk came from"""
+    label = chunk.metadata.get("title") or chunk.metadata.get("source") or "Untitled document"
+    page = chunk.metadata.get("page")
+    return f"{label}, page {page}" if page else label
+
+
+def pack_sources(
+    chunks: List[LangchainDocument],
+    max_tokens: Optional[int] = None,
+    model_name: Optional[str] = None,
+) -> Tuple[str, List[LangchainDocument]]:
+    """Pack chunks from several documents, most relevant first, as numbered sources
+
+    Returns the context and the chunks packed into it; the i-th packed chunk is
+    labelled [i + 1] so answers can cite it.
+    """
+    max_tokens = max_tokens or settings.DOCUMENT_CONTEXT_MAX_TOKENS
+    model_name = model_name or settings.CHAT_MODEL
+    separator_tokens = count_tokens(CHUNK_SEPARATOR, model_name)
+
+    blocks: List[str] = []
+    packed: List[LangchainDocument] = []
+    seen = set()
+    used = 0
+
+    for chunk in chunks:
+        text = chunk.page_content.strip()
+        key = normalize_text(text)
+        if not key or key in seen:
+            deduplicated_chunks.inc()
+            continue
+        seen.add(key)
+
+        block = f"[{len(packed) + 1}] {source_label(chunk)}\n{text}"
+        cost = count_tokens(block, model_name) + (separator_tokens if blocks else 0)
+        if used + cost > max_tokens:
+            dropped_chunks.inc()
+            continue
+
+        blocks.append(block)
+        packed.append(chunk)
+        used += cost
+
+    context_tokens.set(used)
+    return CHUNK_SEPARATOR.join(blocks), packed
+
+
+def pack_context(
+    chunks: List[LangchainDocument],
+    max_tokens: Optional[int] = None,
+    model_name: Optional[str] = None,
+) -> str:
+    """Pack retrieved chunks, most relevant first, into a prompt context under a token budget
+
+    Exact duplicates and chunks contained in an earlier one are dropped, and text a
+    chunk shares with an earlier chunk (the chunker's overlap) is packed only once.
+    Chunks that do not fit are skipped so smaller, less relevant ones can still fill
+    the budget; if not even the most relevant chunk fits, it is truncated.
+    """
+    max_tokens = max_tokens or settings.DOCUMENT_CONTEXT_MAX_TOKENS
+    model_name = model_name or settings.CHAT_MODEL
+    separator_tokens = count_tokens(CHUNK_SEPARATOR, model_name)
+
+    packed: List[str] = []
+    seen = set()
+    used = 0
+
+    for chunk in chunks:
+        text = chunk.page_content.strip()
+        key = normalize_text(text)
+        if not key or key in seen or any(key in normalize_text(other) for other in packed):
+            deduplicated_chunks.inc()
+            continue
+        seen.add(key)
+
+        for other in packed:
+            text = _trim_overlap(other, text)
+        text = text.strip()
+        if not text:
+            deduplicated_chunks.inc()
+            continue
+
+        cost = count_tokens(text, model_name) + (separator_tokens if packed else 0)
+        if used + cost > max_tokens:
+            dropped_chunks.inc()
+            continue
+
+        packed.append(text)
+        used += cost
+
+    if not packed and chunks:
+        # Better a truncated best match than no context at all
+        packed.append(truncate_to_tokens(chunks[0].page_content.strip(), max_tokens, model_name))
+        used = count_tokens(packed[0], model_name)
+
+    context_tokens.set(used)
+    return CHUNK_SEPARATOR.join(packed)
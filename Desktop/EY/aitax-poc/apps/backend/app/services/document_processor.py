@@ -1,134 +1,133 @@
+import asyncio
 import os
-from typing import List, Dict, Any
+from typing import AsyncIterator, Optional
 
-import fitz  # PyMuPDF
 from langchain_core.documents import Document as LangchainDocument
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from sqlmodel import Session, select
 
 from app.core.config import settings
 from app.core.database import engine
 from app.models.document import Document
+from app.services.answer_cache import invalidate_document_answers
+from app.services.chunking import batched, chunk_documents
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.clients import clients
+from app.services.extraction import iter_pdf_pages
+from app.services.lexical_index import LexicalIndexBuilder, store_lexical_index
+from app.services.vector_store import get_partition
 
 
-async def extract_text_from_pdf(file_path: str) -> List[LangchainDocument]:
-    """Extract text from PDF file and create Langchain documents"""
-    documents = []
-    
-    try:
-        # Open the PDF file
-        pdf_document = fitz.open(file_path)
-        
-        # Process each page
-        for page_num, page in enumerate(pdf_document):
-            # Extract text from the page
-            text = page.get_text()
-            
-            # Create a Langchain document
-            doc = LangchainDocument(
-                page_content=text,
-                metadata={
-                    "source": os.path.basename(file_path),
-                    "page": page_num + 1,
-                    "total_pages": len(pdf_document)
-                }
-            )
-            
-            documents.append(doc)
-        
-        pdf_document.close()
-        
-    except Exception as e:
-        # Create a document with error information
-        error_doc = LangchainDocument(
-            page_content=f"Error extracting text from PDF: {str(e)}",
-            metadata={
-                "source": os.path.basename(file_path),
-                "error": True
-            }
-        )
-        documents.append(error_doc)
-    
-    return documents
+async def extract_text_from_pdf(file_path: str) -> AsyncIterator[LangchainDocument]:
+    """Extract text from PDF file in worker processes and yield one Langchain document per page
 
-
-async def extract_text_from_txt(file_path: str) -> List[LangchainDocument]:
-    """Extract text from TXT file and create Langchain documents"""
-    documents = []
-    
-    try:
-        # Open and read the text file
-        with open(file_path, 'r', encoding='utf-8') as file:
-            text = file.read()
-        
+    Extraction errors and timeouts propagate, so the ingestion job is
+    retried or failed instead of indexing an error message as content.
+    """
+    async for page_num, total_pages, text in iter_pdf_pages(file_path):
         # Create a Langchain document
-        doc = LangchainDocument(
+        yield LangchainDocument(
             page_content=text,
-            metadata={
-                "source": os.path.basename(file_path)
-            }
-        )
-        
-        documents.append(doc)
-        
-    except Exception as e:
-        # Create a document with error information
-        error_doc = LangchainDocument(
-            page_content=f"Error extracting text from TXT: {str(e)}",
             metadata={
                 "source": os.path.basename(file_path),
-                "error": True
+                "page": page_num,
+                "total_pages": total_pages
             }
         )
-        documents.append(error_doc)
+
+
+async def extract_text_from_txt(file_path: str) -> AsyncIterator[LangchainDocument]:
+    """Read a TXT file in blocks and yield one Langchain document per block
+
+    Each block is read in a thread so the event loop keeps serving, and
+    only one block is held in memory. Blocks end after their last line
+    break, so a line is never split between two blocks. Read errors
+    propagate like PDF extraction errors.
+    """
+    metadata = {"source": os.path.basename(file_path)}
+    remainder = ""
     
-    return documents
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            block = await asyncio.to_thread(file.read, settings.TXT_BLOCK_SIZE_CHARS)
+            if not block:
+                break
+            
+            # Carry the unfinished last line over to the next block
+            text = remainder + block
+            end = text.rfind("\n") + 1 or len(text)
+            remainder = text[end:]
+            yield LangchainDocument(page_content=text[:end], metadata=dict(metadata))
+    
+    if remainder:
+        yield LangchainDocument(page_content=remainder, metadata=dict(metadata))
+
+
+def _load_document(document_id: int) -> Optional[Document]:
+    """Get a document to index, dropping answers cached from its previous index"""
+    with Session(engine) as session:
+        invalidate_document_answers(session, document_id)
+        session.commit()
+        return session.get(Document, document_id)
 
 
 async def process_document(document_id: int) -> None:
     """Process a document and store in vector database"""
-    # Get document from database
-    with Session(engine) as session:
-        document = session.get(Document, document_id)
-        if not document:
-            print(f"Document with ID {document_id} not found")
-            return
+    # Get document from database, in a thread so the event loop keeps serving
+    document = await asyncio.to_thread(_load_document, document_id)
+    if not document:
+        print(f"Document with ID {document_id} not found")
+        return
     
     # Extract text based on file type
     if document.file_type.value == "pdf":
-        documents = await extract_text_from_pdf(document.file_path)
+        pages = extract_text_from_pdf(document.file_path)
     elif document.file_type.value == "txt":
-        documents = await extract_text_from_txt(document.file_path)
+        pages = extract_text_from_txt(document.file_path)
     else:
         print(f"Unsupported file type: {document.file_type}")
         return
     
-    # Add document metadata
-    for doc in documents:
-        doc.metadata["document_id"] = str(document.id)
-        doc.metadata["title"] = document.title
-        doc.metadata["user_id"] = str(document.user_id)
-    
-    # Initialize embeddings
-    embeddings = OpenAIEmbeddings(model=settings.EMBEDDING_MODEL)
-    
-    # Define collection name
-    collection_name = f"{settings.CHROMA_COLLECTION_PREFIX}__docs__v1"
+    # Initialize embeddings, reusing vectors of chunks embedded before
+    embeddings = CachedEmbeddings(clients.embedding_service, clients.embedding_model_key)
     
     # Store documents in Chroma
     try:
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=embeddings,
-            client_settings={"host": settings.CHROMA_HOST, "port": settings.CHROMA_PORT}
-        )
+        # Getting the collection may create it over HTTP, so keep it off the event loop
+        partition = await asyncio.to_thread(get_partition, document.user_id)
+        
+        # Stream pages through the chunker so only one batch is held in memory
+        chunk_count = 0
+        lexical_index = LexicalIndexBuilder()
+        chunks = chunk_documents(pages)
+        async for batch in batched(chunks, settings.CHUNK_BATCH_SIZE):
+            # Add document metadata
+            for doc in batch:
+                doc.metadata["document_id"] = str(document.id)
+                doc.metadata["title"] = document.title
+                doc.metadata["user_id"] = str(document.user_id)
+            
+            # Embed the batch with bounded concurrency
+            texts = [doc.page_content for doc in batch]
+            vectors = await embeddings.aembed_documents(texts)
+            
+            # Deterministic IDs make a retried job overwrite its chunks instead of duplicating them
+            await asyncio.to_thread(
+                partition.upsert,
+                ids=[f"{document.id}:{doc.metadata['chunk_index']}" for doc in batch],
+                embeddings=vectors,
+                documents=texts,
+                metadatas=[doc.metadata for doc in batch]
+            )
+            chunk_count += len(batch)
+            
+            for doc in batch:
+                lexical_index.add(doc.metadata["chunk_index"], doc.page_content)
         
-        # Add documents to vector store
-        vectorstore.add_documents(documents)
+        # Keep a BM25 index next to the vectors for keyword and identifier queries
+        await asyncio.to_thread(store_lexical_index, document.id, lexical_index.build())
         
-        print(f"Successfully processed document {document_id} and added to vector store")
+        print(f"Successfully processed document {document_id} into {chunk_count} chunks")
         
     except Exception as e:
         print(f"Error storing document in vector database: {str(e)}")
-        return
+        raise
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List
+
+from langchain_core.embeddings import Embeddings
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.embedding_cache import EmbeddingCacheEntry
+
+cache_hits = metrics.counter("embedding_cache_hits", "Chunks served from the embedding cache")
+cache_misses = metrics.counter("embedding_cache_misses", "Chunks sent to the embedding API")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode form and whitespace so trivially different chunks match"""
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+
+def chunk_hash(text: str) -> str:
+    """Get the SHA-256 hash of a normalized chunk"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    return array("f", data).tolist()
+
+
+def get_cached_vectors(embedding_model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+    """Load cached vectors for the given chunk hashes"""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+
+    with Session(engine) as session:
+        entries = session.exec(
+            select(EmbeddingCacheEntry).where(
+                EmbeddingCacheEntry.embedding_model == embedding_model,
+                EmbeddingCacheEntry.chunk_hash.in_(hashes)
+            )
+        ).all()
+
+    return {entry.chunk_hash: unpack_vector(entry.vector) for entry in entries}
+
+
+def store_vectors(embedding_model: str, vectors: Dict[str, List[float]]) -> None:
+    """Store vectors by chunk hash, ignoring entries another worker already wrote"""
+    if not vectors:
+        return
+
+    insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(EmbeddingCacheEntry).values([
+        {"embedding_model": embedding_model, "chunk_hash": key, "vector": pack_vector(vector)}
+        for key, vector in vectors.items()
+    ]).on_conflict_do_nothing()
+
+    with Session(engine) as session:
+        session.execute(statement)
+        session.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that reuses vectors keyed by (model, normalized chunk hash)"""
+
+    def __init__(self, underlying: Embeddings, embedding_model: str):
+        self.underlying = underlying
+        self.embedding_model = embedding_model
+
+    def _split(self, texts: List[str]):
+        """Look up cached vectors and collect the unique texts still to embed"""
+        hashes = [chunk_hash(text) for text in texts]
+        vectors = get_cached_vectors(self.embedding_model, hashes)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        cache_hits.inc(len(texts) - len(missing))
+        cache_misses.inc(len(missing))
+        return hashes, vectors, missing
+
+    def _merge(self, hashes, vectors, missing, new_vectors) -> List[List[float]]:
+        """Store newly embedded vectors and return vectors in input order"""
+        fresh = dict(zip(missing.keys(), new_vectors))
+        store_vectors(self.embedding_model, fresh)
+        vectors.update(fresh)
+        return [vectors[key] for key in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, vectors, missing = self._split(texts)
+        new_vectors = self.underlying.embed_documents(list(missing.values())) if missing else []
+        return self._merge(hashes, vectors, missing, new_vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Cache reads and writes run in a thread, off the event loop
+        hashes, vectors, missing = await asyncio.to_thread(self._split, texts)
+        new_vectors = (
+            await self.underlying.aembed_documents(list(missing.values())) if missing else []
+        )
+        return await asyncio.to_thread(self._merge, hashes, vectors, missing, new_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        hashes, vectors, missing = self._split([text])
+        new_vectors = [self.underlying.embed_query(text)] if missing else []
+        return self._merge(hashes, vectors, missing, new_vectors)[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        hashes, vectors, missing = await asyncio.to_thread(self._split, [text])
+        new_vectors = [await self.underlying.aembed_query(text)] if missing else []
+        return (await asyncio.to_thread(self._merge, hashes, vectors, missing, new_vectors))[0]
@@ -0,0 +1,206 @@
+import asyncio
+import random
+import re
+import time
+from typing import List, Optional
+
+import openai
+from langchain_core.embeddings import Embeddings
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+)
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.chunking import count_tokens
+
+embedded_chunks = metrics.counter("embedding_chunks_total", "Chunks embedded through the API")
+embedded_tokens = metrics.counter("embedding_tokens_total", "Tokens embedded through the API")
+rate_limited = metrics.counter("embedding_rate_limited_total", "Embedding calls rejected with 429")
+chunks_per_second = metrics.gauge("embedding_chunks_per_second", "Throughput of the last bulk call")
+tokens_per_second = metrics.gauge("embedding_tokens_per_second", "Throughput of the last bulk call")
+concurrency_limit = metrics.gauge("embedding_concurrency_limit", "Current adaptive concurrency")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse durations like '20ms', '1.5s' or '6m0s' into seconds"""
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Read how long the API asked us to wait from a rate limit response"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    if "retry-after-ms" in headers:
+        return float(headers["retry-after-ms"]) / 1000
+    if "retry-after" in headers:
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            return None
+
+    # Fall back to the time until the exhausted quota resets
+    resets = [
+        _parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if name in headers
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def _wait(retry_state: RetryCallState) -> float:
+    """Wait as long as the API asked, or back off exponentially with jitter"""
+    delay = retry_after(retry_state.outcome.exception())
+    if delay is None:
+        delay = 2 ** (retry_state.attempt_number - 1) + random.uniform(0, 1)
+    return min(delay, settings.EMBEDDING_RETRY_MAX_WAIT_SECONDS)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on rate limiting and grows back on success"""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        concurrency_limit.set(self.limit)
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def __aenter__(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+        # Everyone pauses while the API has asked us to back off
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self.condition:
+            self._active -= 1
+            self.condition.notify_all()
+
+    def on_success(self) -> None:
+        """Grow the limit by one after a full window of successful calls"""
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+            concurrency_limit.set(self.limit)
+
+    def on_rate_limited(self, delay: Optional[float]) -> None:
+        """Halve the limit and pause new calls for the requested delay"""
+        rate_limited.inc()
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        concurrency_limit.set(self.limit)
+        if delay:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+
+class EmbeddingService(Embeddings):
+    """Embedding client that batches texts, bounds concurrency and backs off on rate limits"""
+
+    def __init__(
+        self,
+        client: Embeddings,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.client = client
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.limiter = AdaptiveLimiter(max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY)
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _retry_options(self) -> dict:
+        return {
+            "retry": retry_if_exception_type(RETRYABLE_ERRORS),
+            "wait": _wait,
+            "stop": stop_after_attempt(settings.EMBEDDING_MAX_RETRIES),
+            "reraise": True,
+        }
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch within the concurrency limit, retrying transient errors"""
+        async for attempt in AsyncRetrying(**self._retry_options()):
+            with attempt:
+                async with self.limiter:
+                    try:
+                        vectors = await self.client.aembed_documents(texts)
+                    except openai.RateLimitError as e:
+                        self.limiter.on_rate_limited(retry_after(e))
+                        raise
+                self.limiter.on_success()
+        return vectors
+
+    def _record_throughput(self, texts: List[str], elapsed: float) -> None:
+        tokens = sum(count_tokens(text) for text in texts)
+        embedded_chunks.inc(len(texts))
+        embedded_tokens.inc(tokens)
+        if elapsed > 0:
+            chunks_per_second.set(len(texts) / elapsed)
+            tokens_per_second.set(tokens / elapsed)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._aembed_batch(batch) for batch in self._batches(texts))
+        )
+        self._record_throughput(texts, time.perf_counter() - start)
+        return [vector for batch in results for vector in batch]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors: List[List[float]] = []
+        for batch in self._batches(texts):
+            for attempt in Retrying(**self._retry_options()):
+                with attempt:
+                    vectors.extend(self.client.embed_documents(batch))
+        self._record_throughput(texts, time.perf_counter() - start)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        for attempt in Retrying(**self._retry_options()):
+            with attempt:
+                vector = self.client.embed_query(text)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async for attempt in AsyncRetrying(**self._retry_options()):
+            with attempt:
+                vector = await self.client.aembed_query(text)
+        return vector
+
@@ -0,0 +1,156 @@
+import asyncio
+import multiprocessing
+from collections import deque
+from multiprocessing.pool import Pool
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import fitz  # PyMuPDF
+
+from app.core.config import settings
+
+# How often a task is resubmitted after another task's timeout replaced the pool
+MAX_RESUBMITS = 3
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Count the pages of a PDF file (runs in a worker process)"""
+    with fitz.open(file_path) as pdf_document:
+        return len(pdf_document)
+
+
+def extract_pdf_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF file (runs in a worker process)"""
+    with fitz.open(file_path) as pdf_document:
+        return [pdf_document[page_num].get_text() for page_num in range(start, end)]
+
+
+def split_page_ranges(total_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split a page count into consecutive [start, end) ranges"""
+    return [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+
+class PoolReplacedError(Exception):
+    """The pool running a task was replaced before the task finished"""
+
+
+class ExtractionPool:
+    """Worker processes shared by every PDF extraction of the process
+
+    At most PDF_EXTRACTION_WORKERS tasks are handed to the pool at a time, so
+    a task starts as soon as it is submitted and its timeout only covers the
+    time a worker spends on it. A worker cannot be interrupted, so a task that
+    times out replaces the whole pool; the tasks of other documents that were
+    running on it are resubmitted to the new pool.
+    """
+
+    def __init__(self):
+        self._pool: Optional[Pool] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[Pool, Set["asyncio.Future[Any]"]] = {}
+
+    def _create_pool(self) -> Pool:
+        # Spawned workers do not inherit the event loop or open connections
+        pool = multiprocessing.get_context("spawn").Pool(settings.PDF_EXTRACTION_WORKERS)
+        self._pending[pool] = set()
+        return pool
+
+    def startup(self) -> None:
+        """Start the worker processes up front so no document pays the spawn cost"""
+        if self._pool is None:
+            self._pool = self._create_pool()
+            self._slots = asyncio.Semaphore(settings.PDF_EXTRACTION_WORKERS)
+
+    async def shutdown(self) -> None:
+        """Terminate the worker processes"""
+        pool, self._pool, self._slots = self._pool, None, None
+        self._pending.clear()
+        if pool is not None:
+            await asyncio.to_thread(pool.terminate)
+
+    def _submit(self, pool: Pool, func: Callable[..., Any], args: Tuple[Any, ...]) -> "asyncio.Future[Any]":
+        """Run a function in the pool and get its result as an asyncio future"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending[pool]
+        pending.add(future)
+
+        def settle(set_outcome: Callable[[Any], None], outcome: Any) -> None:
+            pending.discard(future)
+            if not future.done():
+                set_outcome(outcome)
+
+        # Callbacks run on the pool's result thread
+        pool.apply_async(
+            func,
+            args,
+            callback=lambda result: loop.call_soon_threadsafe(settle, future.set_result, result),
+            error_callback=lambda error: loop.call_soon_threadsafe(settle, future.set_exception, error),
+        )
+        return future
+
+    async def _replace(self, pool: Pool) -> None:
+        """Swap a pool with a hung worker for a fresh one and terminate it"""
+        if pool is not self._pool:
+            # Another timeout already replaced it
+            return
+
+        self._pool = self._create_pool()
+        for future in self._pending.pop(pool, set()):
+            if not future.done():
+                future.set_exception(PoolReplacedError())
+        await asyncio.to_thread(pool.terminate)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a function in a worker process, failing if it takes too long"""
+        self.startup()
+        timeout = settings.PDF_EXTRACTION_TIMEOUT_SECONDS
+
+        async with self._slots:
+            for _ in range(MAX_RESUBMITS + 1):
+                pool = self._pool
+                try:
+                    return await asyncio.wait_for(self._submit(pool, func, args), timeout)
+                except PoolReplacedError:
+                    continue
+                except asyncio.TimeoutError:
+                    await self._replace(pool)
+                    raise TimeoutError(f"PDF extraction task timed out after {timeout} seconds")
+
+        raise PoolReplacedError(f"PDF extraction pool was replaced {MAX_RESUBMITS + 1} times while the task ran")
+
+
+# Create extraction pool instance
+extraction_pool = ExtractionPool()
+
+
+async def iter_pdf_pages(file_path: str) -> AsyncIterator[Tuple[int, int, str]]:
+    """Extract PDF pages in parallel and yield (page number, total pages, text) in order"""
+    total_pages = await extraction_pool.run(count_pdf_pages, file_path)
+    ranges = deque(split_page_ranges(total_pages, settings.PDF_PAGES_PER_TASK))
+
+    # Keep at most one range per worker in flight so memory stays bounded
+    pending: Deque[Tuple[int, "asyncio.Task[List[str]]"]] = deque()
+
+    def submit_next() -> None:
+        if ranges:
+            start, end = ranges.popleft()
+            task = asyncio.create_task(extraction_pool.run(extract_pdf_page_range, file_path, start, end))
+            pending.append((start, task))
+
+    try:
+        for _ in range(settings.PDF_EXTRACTION_WORKERS):
+            submit_next()
+
+        while pending:
+            start, task = pending.popleft()
+            texts = await task
+            submit_next()
+
+            for offset, text in enumerate(texts):
+                yield start + offset + 1, total_pages, text
+    finally:
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+
+class LatencyDistribution:
+    """Simulated call latency, sampled in seconds from a distribution with a given mean and spread"""
+
+    def __init__(self, kind: str, mean_ms: float, stddev_ms: float = 0.0, rng: Optional[random.Random] = None):
+        if kind not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.mean = max(mean_ms, 0.0) / 1000
+        self.stddev = max(stddev_ms, 0.0) / 1000
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.mean == 0 or self.stddev == 0 or self.kind == "constant":
+            return self.mean
+        if self.kind == "uniform":
+            spread = min(self.stddev * math.sqrt(3), self.mean)
+            return self.rng.uniform(self.mean - spread, self.mean + spread)
+        if self.kind == "normal":
+            return max(0.0, self.rng.gauss(self.mean, self.stddev))
+
+        # Lognormal with the requested mean and standard deviation gives a realistic long tail
+        sigma = math.sqrt(math.log(1 + (self.stddev / self.mean) ** 2))
+        mu = math.log(self.mean) - sigma ** 2 / 2
+        return self.rng.lognormvariate(mu, sigma)
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic embeddings built by hashing words, so texts sharing words are similar"""
+
+    def __init__(self, dimensions: int, latency: LatencyDistribution):
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        words = _WORD_PATTERN.findall(text.lower()) or [text]
+        for word in words:
+            seed = _seed(word)
+            vector[seed % self.dimensions] += 1.0 if seed & (1 << 63) else -1.0
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            # Words that cancel out still get a stable, non-zero vector
+            vector[_seed(text) % self.dimensions] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency.sample())
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency.sample())
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with deterministic text after a simulated delay
+
+    The reply is drawn from the words of the prompt, seeded by the prompt itself, so
+    the same prompt always gets the same reply. The delay is a time to first token
+    followed by a per-word delay, which streaming spreads between chunks.
+    """
+
+    model_name: str = "fake"
+    response_words: int = 150
+    first_token_latency: LatencyDistribution
+    token_latency: LatencyDistribution
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        vocabulary = _WORD_PATTERN.findall(prompt) or ["fake"]
+        rng = random.Random(_seed(f"{self.model_name}\n{prompt}"))
+        return [rng.choice(vocabulary) for _ in range(self.response_words)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        words = self._words(messages)
+        time.sleep(self.first_token_latency.sample() + sum(self.token_latency.sample() for _ in words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        words = self._words(messages)
+        await asyncio.sleep(self.first_token_latency.sample() + sum(self.token_latency.sample() for _ in words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _chunks(self, words: List[str]) -> Iterator[ChatGenerationChunk]:
+        for position, word in enumerate(words):
+            text = word if position == 0 else f" {word}"
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency.sample())
+        for position, chunk in enumerate(self._chunks(self._words(messages))):
+            if position:
+                time.sleep(self.token_latency.sample())
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_latency.sample())
+        for position, chunk in enumerate(self._chunks(self._words(messages))):
+            if position:
+                await asyncio.sleep(self.token_latency.sample())
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
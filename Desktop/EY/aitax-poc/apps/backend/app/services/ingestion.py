@@ -0,0 +1,272 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.document import Document, DocumentStatus
+from app.models.ingestion import IngestionJob, JobStatus
+from app.services.document_processor import process_document
+
+
+def enqueue_document(session: Session, document_id: int) -> IngestionJob:
+    """Add an ingestion job for a document to the session without committing"""
+    job = IngestionJob(
+        document_id=document_id,
+        max_attempts=settings.INGESTION_MAX_ATTEMPTS
+    )
+    session.add(job)
+    return job
+
+
+def get_latest_job(session: Session, document_id: int) -> Optional[IngestionJob]:
+    """Get the most recent ingestion job for a document"""
+    return session.exec(
+        select(IngestionJob)
+        .where(IngestionJob.document_id == document_id)
+        .order_by(IngestionJob.id.desc())
+    ).first()
+
+
+def _set_document_status(session: Session, document_id: int, status: DocumentStatus) -> None:
+    """Update the processing status stored on a document"""
+    document = session.get(Document, document_id)
+    if document:
+        document.status = status
+        document.updated_at = datetime.utcnow()
+        session.add(document)
+
+
+def _owned(job: IngestionJob):
+    """Condition that a job is still running under the claim a worker made
+
+    Every claim increments attempts, so a worker whose lease was reclaimed by
+    another worker no longer matches and cannot update the job.
+    """
+    return and_(
+        IngestionJob.id == job.id,
+        IngestionJob.status == JobStatus.RUNNING,
+        IngestionJob.attempts == job.attempts
+    )
+
+
+def claim_next_job() -> Optional[IngestionJob]:
+    """Claim the next due job, or a running job whose lease has expired
+
+    An expired job without attempts left is failed instead of reclaimed, so
+    a document that keeps crashing its worker is not retried forever.
+    """
+    now = datetime.utcnow()
+    lease_expired_before = now - timedelta(seconds=settings.INGESTION_LEASE_SECONDS)
+
+    with Session(engine) as session:
+        candidates = session.exec(
+            select(IngestionJob)
+            .where(
+                or_(
+                    and_(
+                        IngestionJob.status == JobStatus.QUEUED,
+                        IngestionJob.available_at <= now
+                    ),
+                    and_(
+                        IngestionJob.status == JobStatus.RUNNING,
+                        IngestionJob.locked_at < lease_expired_before
+                    )
+                )
+            )
+            .order_by(IngestionJob.available_at)
+            .limit(10)
+        ).all()
+
+        for job in candidates:
+            exhausted = job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts
+            if exhausted:
+                values = dict(
+                    status=JobStatus.FAILED,
+                    last_error="Lease expired on the last attempt",
+                    locked_at=None,
+                    updated_at=now
+                )
+            else:
+                values = dict(
+                    status=JobStatus.RUNNING,
+                    attempts=job.attempts + 1,
+                    locked_at=now,
+                    updated_at=now
+                )
+
+            # Conditional update so two workers can never claim the same job
+            result = session.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.id == job.id,
+                    IngestionJob.status == job.status,
+                    IngestionJob.attempts == job.attempts
+                )
+                .values(**values)
+            )
+            if result.rowcount != 1:
+                session.rollback()
+                continue
+
+            if exhausted:
+                print(f"Ingestion job {job.id} failed: lease expired on attempt {job.attempts}")
+                _set_document_status(session, job.document_id, DocumentStatus.FAILED)
+                session.commit()
+                continue
+
+            _set_document_status(session, job.document_id, DocumentStatus.PROCESSING)
+            session.commit()
+            session.refresh(job)
+            return job
+
+    return None
+
+
+def _renew_lease(job: IngestionJob) -> bool:
+    """Extend the lease of a running job; False once the worker no longer owns it"""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        result = session.execute(
+            update(IngestionJob).where(_owned(job)).values(locked_at=now, updated_at=now)
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+def _record_success(job: IngestionJob) -> None:
+    """Mark a job and its document as done, unless the job was reclaimed"""
+    with Session(engine) as session:
+        result = session.execute(
+            update(IngestionJob)
+            .where(_owned(job))
+            .values(
+                status=JobStatus.SUCCEEDED,
+                last_error=None,
+                locked_at=None,
+                updated_at=datetime.utcnow()
+            )
+        )
+        if result.rowcount != 1:
+            # Reclaimed by another worker, or the document was deleted
+            session.rollback()
+            return
+
+        _set_document_status(session, job.document_id, DocumentStatus.READY)
+        session.commit()
+
+
+def _record_failure(job: IngestionJob, error: Exception) -> None:
+    """Schedule a retry with exponential backoff, or fail the job for good"""
+    now = datetime.utcnow()
+    values = dict(last_error=str(error)[:2000], locked_at=None, updated_at=now)
+
+    if job.attempts >= job.max_attempts:
+        values["status"] = JobStatus.FAILED
+        document_status = DocumentStatus.FAILED
+    else:
+        backoff = settings.INGESTION_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        values["status"] = JobStatus.QUEUED
+        values["available_at"] = now + timedelta(seconds=backoff)
+        document_status = DocumentStatus.PENDING
+
+    with Session(engine) as session:
+        result = session.execute(update(IngestionJob).where(_owned(job)).values(**values))
+        if result.rowcount != 1:
+            session.rollback()
+            return
+
+        _set_document_status(session, job.document_id, document_status)
+        session.commit()
+
+
+async def _keep_lease(job: IngestionJob) -> None:
+    """Renew a job's lease while it runs; returns once the lease is lost"""
+    while True:
+        await asyncio.sleep(settings.INGESTION_HEARTBEAT_SECONDS)
+        try:
+            if not await asyncio.to_thread(_renew_lease, job):
+                return
+        except Exception as e:
+            # Keep trying; the lease only runs out after INGESTION_LEASE_SECONDS
+            print(f"Error renewing lease of ingestion job {job.id}: {str(e)}")
+
+
+async def run_job(job: IngestionJob) -> None:
+    """Process the document behind a claimed job and record the outcome"""
+    processing = asyncio.create_task(process_document(job.document_id))
+    heartbeat = asyncio.create_task(_keep_lease(job))
+    try:
+        await asyncio.wait({processing, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Stops processing once the lease is lost, or when the pool is stopped
+        for task in (processing, heartbeat):
+            task.cancel()
+        await asyncio.gather(processing, heartbeat, return_exceptions=True)
+
+    if processing.cancelled():
+        print(f"Ingestion job {job.id} lost its lease on attempt {job.attempts}; stopped processing")
+        return
+
+    error = processing.exception()
+    if error is not None:
+        print(f"Ingestion job {job.id} failed on attempt {job.attempts}: {str(error)}")
+        await asyncio.to_thread(_record_failure, job, error)
+    else:
+        await asyncio.to_thread(_record_success, job)
+
+
+class IngestionWorkerPool:
+    """Pool of asyncio workers that drain the ingestion job table"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.concurrency = concurrency or settings.INGESTION_WORKERS
+        self.poll_interval = poll_interval or settings.INGESTION_POLL_INTERVAL_SECONDS
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks"""
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"ingestion-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def join(self) -> None:
+        """Wait until all worker tasks have exited"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are reclaimed once their lease expires"""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await self.join()
+        self._tasks = []
+
+    async def _work(self) -> None:
+        """Claim and run jobs until the pool is stopped"""
+        while not self._stopping.is_set():
+            try:
+                # Job table queries run in a thread, off the event loop shared with the API
+                job = await asyncio.to_thread(claim_next_job)
+            except Exception as e:
+                print(f"Error claiming ingestion job: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await run_job(job)
@@ -0,0 +1,191 @@
+import json
+import math
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.lexical_index import LexicalIndexEntry
+
+# Identifiers such as "15e", "62.01.Z", "123-456-78-90" or "2024/1234" are kept whole
+TOKEN_PATTERN = re.compile(r"\d+[^\W\d_]*(?:[./-]\d+[^\W\d_]*)*(?:\.[^\W\d_]\b)?|[^\W\d_]+")
+
+# Abbreviations that mark a query as a lookup of a provision or register entry
+IDENTIFIER_TERMS = {
+    "art", "ust", "pkt", "lit", "par", "nip", "pkd", "regon", "krs", "tpr", "dz", "poz",
+}
+
+STOPWORDS = {
+    # Polish
+    "a", "aby", "albo", "ale", "co", "czy", "dla", "do", "i", "jak", "jaki", "jest", "ich",
+    "jego", "jej", "kiedy", "która", "które", "który", "na", "nie", "o", "od", "oraz", "po",
+    "przez", "się", "są", "tak", "to", "w", "we", "z", "za", "ze", "że",
+    # English
+    "an", "and", "are", "about", "does", "for", "how", "in", "is", "of", "on", "or", "the",
+    "this", "what", "when", "which", "with",
+}
+
+# Plain numbers up to this many digits are amounts, counts or years rather than identifiers
+MAX_PLAIN_NUMBER_DIGITS = 4
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, adding a digits-only form of separated numbers"""
+    text = unicodedata.normalize("NFC", text).lower()
+    terms = []
+    for token in TOKEN_PATTERN.findall(text):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+
+        # "123-456-78-90" should also match "1234567890"
+        digits = re.sub(r"[./-]", "", token)
+        if digits != token and digits.isdigit():
+            terms.append(digits)
+    return terms
+
+
+def _is_identifier(term: str) -> bool:
+    if term in IDENTIFIER_TERMS:
+        return True
+    if not any(char.isdigit() for char in term):
+        return False
+    # "62.01.z", "2024/1234" and "15e" are identifiers, as is a long number such as a NIP; "2027" is not
+    return not term.isdigit() or len(term) > MAX_PLAIN_NUMBER_DIGITS
+
+
+def is_identifier_query(query: str) -> bool:
+    """Whether a query is mostly identifiers, where exact matching beats embeddings"""
+    terms = [term for term in TOKEN_PATTERN.findall(unicodedata.normalize("NFC", query).lower())
+             if term not in STOPWORDS]
+    if not terms:
+        return False
+    identifiers = sum(1 for term in terms if _is_identifier(term))
+    return identifiers / len(terms) >= settings.LEXICAL_ONLY_IDENTIFIER_RATIO
+
+
+class LexicalIndex:
+    """Okapi BM25 index over the chunks of one document, keyed by chunk index"""
+
+    def __init__(self, lengths: Dict[int, int], postings: Dict[str, List[Tuple[int, int]]]):
+        self.lengths = lengths
+        self.postings = postings
+        self.average_length = sum(lengths.values()) / len(lengths) if lengths else 0.0
+
+    @classmethod
+    def build(cls, chunks: Iterable[Tuple[int, str]]) -> "LexicalIndex":
+        """Build an index from (chunk_index, text) pairs"""
+        builder = LexicalIndexBuilder()
+        for chunk_index, text in chunks:
+            builder.add(chunk_index, text)
+        return builder.build()
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Get the chunk indexes of the k best matching chunks, best first"""
+        if not self.lengths:
+            return []
+
+        count = len(self.lengths)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_index, frequency in postings:
+                norm = 1 - BM25_B + BM25_B * self.lengths[chunk_index] / (self.average_length or 1)
+                scores[chunk_index] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+    @property
+    def nbytes(self) -> int:
+        # Rough size of the postings held in memory
+        return sum(len(term) + 16 * len(postings) for term, postings in self.postings.items())
+
+    def dumps(self) -> bytes:
+        """Serialize the index to compressed JSON"""
+        data = {
+            "lengths": [[chunk_index, length] for chunk_index, length in self.lengths.items()],
+            "postings": self.postings,
+        }
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def loads(cls, payload: bytes) -> "LexicalIndex":
+        """Deserialize an index written by dumps"""
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        lengths = {chunk_index: length for chunk_index, length in data["lengths"]}
+        postings = {
+            term: [(chunk_index, frequency) for chunk_index, frequency in entries]
+            for term, entries in data["postings"].items()
+        }
+        return cls(lengths, postings)
+
+
+class LexicalIndexBuilder:
+    """Accumulates chunk term counts while a document is being ingested"""
+
+    def __init__(self):
+        self.lengths: Dict[int, int] = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    def add(self, chunk_index: int, text: str) -> None:
+        terms = tokenize(text)
+        self.lengths[chunk_index] = len(terms)
+        for term, frequency in Counter(terms).items():
+            self.postings[term].append((chunk_index, frequency))
+
+    def build(self) -> LexicalIndex:
+        return LexicalIndex(self.lengths, dict(self.postings))
+
+
+def store_lexical_index(document_id: int, index: LexicalIndex) -> None:
+    """Store or replace the lexical index of a document"""
+    insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(LexicalIndexEntry).values(
+        document_id=document_id, data=index.dumps(), created_at=datetime.utcnow()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["document_id"],
+        set_={"data": statement.excluded.data, "created_at": statement.excluded.created_at}
+    )
+
+    with Session(engine) as session:
+        session.execute(statement)
+        session.commit()
+
+
+def load_lexical_index(document_id: int) -> Optional[LexicalIndex]:
+    """Load the lexical index of a document, if one was built"""
+    with Session(engine) as session:
+        entry = session.get(LexicalIndexEntry, document_id)
+        return LexicalIndex.loads(entry.data) if entry else None
+
+
+def delete_lexical_index(session: Session, document_id: int) -> None:
+    """Delete the lexical index of a document (caller commits)"""
+    session.execute(delete(LexicalIndexEntry).where(LexicalIndexEntry.document_id == document_id))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: Optional[int] = None) -> List[int]:
+    """Merge rankings of the same items by summing 1 / (k + rank)"""
+    k = k or settings.HYBRID_RRF_K
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,222 @@
+import re
+import time
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.chunking import count_tokens
+from app.services.clients import clients
+from app.services.prompts import RegisteredPrompt
+
+fallbacks = metrics.counter("model_router_fallbacks_total", "Fast tier answers retried on the strong tier")
+
+
+class ModelTier(str, Enum):
+    FAST = "fast"
+    STRONG = "strong"
+
+
+class ModelTask(str, Enum):
+    PERSONALIZED_SUMMARY = "personalized_summary"
+    DOCUMENT_ANSWER = "document_answer"
+    LIBRARY_ANSWER = "library_answer"
+    CONDENSE_QUESTION = "condense_question"
+    CHAT_SUMMARY = "chat_summary"
+
+
+# Tasks routed to a fixed tier; the rest are classified per request
+TASK_TIERS: Dict[ModelTask, ModelTier] = {
+    # Cached and read by many users, so quality is worth the price
+    ModelTask.PERSONALIZED_SUMMARY: ModelTier.STRONG,
+    # Short rewriting jobs any model handles
+    ModelTask.CONDENSE_QUESTION: ModelTier.FAST,
+    ModelTask.CHAT_SUMMARY: ModelTier.FAST,
+}
+
+# Tasks whose fast tier answers are checked for low confidence
+FALLBACK_TASKS = {ModelTask.DOCUMENT_ANSWER, ModelTask.LIBRARY_ANSWER}
+
+# Words asking for reasoning rather than a lookup
+COMPLEX_TERMS = {
+    # Polish
+    "dlaczego", "porównaj", "porównanie", "różnica", "różnice", "oblicz", "obliczyć", "wylicz",
+    "wyjaśnij", "przeanalizuj", "analiza", "konsekwencje", "skutki", "ryzyko", "powinienem",
+    "powinniśmy", "opłaca",
+    # English
+    "why", "compare", "comparison", "difference", "differences", "calculate", "compute", "explain",
+    "analyze", "analyse", "implications", "consequences", "risk", "risks", "should",
+}
+
+# Phrases of an answer that could not be given from the context
+LOW_CONFIDENCE_PHRASES = (
+    "don't have enough information",
+    "do not have enough information",
+    "not enough information",
+    "cannot determine",
+    "can't determine",
+    "i'm not sure",
+    "i am not sure",
+    "unable to answer",
+    "nie mam wystarczających informacji",
+    "brak wystarczających informacji",
+    "nie jestem pewien",
+    "nie jestem pewna",
+    "trudno powiedzieć",
+)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class TierMetrics:
+    """Calls, latency and tokens of one model tier"""
+
+    def __init__(self, tier: ModelTier):
+        prefix = f"model_tier_{tier.value}"
+        self.calls = metrics.counter(f"{prefix}_calls_total", f"Calls to the {tier.value} tier")
+        self.latency = metrics.counter(f"{prefix}_latency_seconds_total", f"Time spent in {tier.value} tier calls")
+        self.last_latency = metrics.gauge(f"{prefix}_last_latency_seconds", f"Latency of the last {tier.value} tier call")
+        self.prompt_tokens = metrics.counter(f"{prefix}_prompt_tokens_total", f"Prompt tokens sent to the {tier.value} tier")
+        self.completion_tokens = metrics.counter(
+            f"{prefix}_completion_tokens_total", f"Completion tokens returned by the {tier.value} tier"
+        )
+
+    def record(self, elapsed: float, prompt_tokens: int, completion: str) -> None:
+        self.calls.inc()
+        self.latency.inc(elapsed)
+        self.last_latency.set(elapsed)
+        self.prompt_tokens.inc(prompt_tokens)
+        self.completion_tokens.inc(count_tokens(completion, settings.CHAT_MODEL))
+
+
+tier_metrics = {tier: TierMetrics(tier) for tier in ModelTier}
+
+
+def tier_model(tier: ModelTier) -> BaseChatModel:
+    """Get the chat model serving a tier"""
+    return clients.fast_llm if tier == ModelTier.FAST else clients.llm
+
+
+def is_complex_question(question: str) -> bool:
+    """Whether a question asks for reasoning rather than looking up a fact"""
+    words = _WORD_PATTERN.findall(question.lower())
+    if len(words) > settings.ROUTER_FAST_MAX_QUESTION_WORDS:
+        return True
+    # Several questions in one
+    if question.count("?") > 1:
+        return True
+    return any(word in COMPLEX_TERMS for word in words)
+
+
+def route(task: ModelTask, prompt_tokens: int, question: Optional[str] = None) -> ModelTier:
+    """Pick the tier for a request from its task, prompt size and question"""
+    if not settings.MODEL_ROUTING_ENABLED:
+        return ModelTier.STRONG
+    if task in TASK_TIERS:
+        return TASK_TIERS[task]
+    if prompt_tokens > settings.ROUTER_FAST_MAX_PROMPT_TOKENS:
+        return ModelTier.STRONG
+    if question is not None and is_complex_question(question):
+        return ModelTier.STRONG
+    return ModelTier.FAST
+
+
+def is_low_confidence(answer: str) -> bool:
+    """Whether an answer signals the model could not answer reliably"""
+    text = answer.strip().lower().replace("’", "'")
+    return not text or any(phrase in text for phrase in LOW_CONFIDENCE_PHRASES)
+
+
+def prompt_tokens(prompt: RegisteredPrompt, inputs: Dict[str, str]) -> int:
+    """Count the tokens of a prompt filled with its inputs"""
+    return prompt.overhead_tokens + sum(
+        count_tokens(str(value), settings.CHAT_MODEL) for value in inputs.values()
+    )
+
+
+async def _invoke_tier(
+    tier: ModelTier, prompt: RegisteredPrompt, inputs: Dict[str, str], tokens: int
+) -> str:
+    chain = prompt.template | tier_model(tier) | StrOutputParser()
+    start = time.perf_counter()
+    result = await chain.ainvoke(inputs)
+    tier_metrics[tier].record(time.perf_counter() - start, tokens, result)
+    return result
+
+
+async def run_prompt(
+    task: ModelTask,
+    prompt: RegisteredPrompt,
+    inputs: Dict[str, str],
+    question: Optional[str] = None,
+) -> str:
+    """Run a prompt on the tier routed for it, retrying weak fast answers on the strong tier"""
+    tokens = prompt_tokens(prompt, inputs)
+    tier = route(task, tokens, question)
+
+    result = await _invoke_tier(tier, prompt, inputs, tokens)
+    if tier == ModelTier.FAST and task in FALLBACK_TASKS and is_low_confidence(result):
+        fallbacks.inc()
+        result = await _invoke_tier(ModelTier.STRONG, prompt, inputs, tokens)
+
+    return result
+
+
+async def _stream_tier(
+    tier: ModelTier, prompt: RegisteredPrompt, inputs: Dict[str, str], tokens: int
+) -> AsyncIterator[str]:
+    chain = prompt.template | tier_model(tier) | StrOutputParser()
+    start = time.perf_counter()
+    parts: List[str] = []
+    try:
+        async for token in chain.astream(inputs):
+            parts.append(token)
+            yield token
+    finally:
+        tier_metrics[tier].record(time.perf_counter() - start, tokens, "".join(parts))
+
+
+async def stream_prompt(
+    task: ModelTask,
+    prompt: RegisteredPrompt,
+    inputs: Dict[str, str],
+    question: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Stream a prompt on the tier routed for it
+
+    Fast tier answers that may fall back are held back until the first
+    ROUTER_CONFIDENCE_PROBE_CHARS characters show whether the model is
+    confident, since a refusal comes first; only then are they streamed.
+    """
+    tokens = prompt_tokens(prompt, inputs)
+    tier = route(task, tokens, question)
+
+    if tier == ModelTier.STRONG or task not in FALLBACK_TASKS:
+        async for token in _stream_tier(tier, prompt, inputs, tokens):
+            yield token
+        return
+
+    held: List[str] = []
+    fast_stream = _stream_tier(tier, prompt, inputs, tokens)
+    try:
+        async for token in fast_stream:
+            held.append(token)
+            if sum(len(part) for part in held) >= settings.ROUTER_CONFIDENCE_PROBE_CHARS:
+                break
+
+        if is_low_confidence("".join(held)):
+            await fast_stream.aclose()
+            fallbacks.inc()
+            async for token in _stream_tier(ModelTier.STRONG, prompt, inputs, tokens):
+                yield token
+            return
+
+        for token in held:
+            yield token
+        async for token in fast_stream:
+            yield token
+    finally:
+        await fast_stream.aclose()
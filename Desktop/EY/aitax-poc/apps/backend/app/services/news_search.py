@@ -0,0 +1,228 @@
+import html
+import re
+import unicodedata
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.sql import Select
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.news import News, TaxCategory
+from app.services.lexical_index import TOKEN_PATTERN, tokenize
+
+# Full-text index of news, kept outside the SQLModel metadata: an FTS5 virtual
+# table on SQLite, a table with a GIN-indexed tsvector on PostgreSQL
+SEARCH_TABLE = "newssearch"
+
+# Inflectional endings stripped by the light Polish stemmer, without diacritics, longest first
+POLISH_SUFFIXES = sorted(
+    (
+        "osciami", "osciach", "owania", "owanie", "oscia", "osci", "ami", "ach", "ego", "emu",
+        "owi", "ych", "ich", "ymi", "imi", "ow", "om", "em", "ej", "ie", "ze", "ia", "iu",
+        "a", "e", "i", "o", "u", "y",
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LENGTH = 3
+
+# Letters without a decomposed form, folded by hand
+_FOLDED_LETTERS = str.maketrans({"ł": "l"})
+_SEPARATORS = re.compile(r"[./-]")
+
+# Field weights: a match in the title counts most, one in the content least
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 4.0
+CONTENT_WEIGHT = 1.0
+
+_search_table = table(SEARCH_TABLE, column("rowid"), column("news_id"), column("document"))
+
+
+def stem(term: str) -> str:
+    """Strip a Polish inflectional ending of a folded term, so "podatek", "podatku" and "podatkow" match"""
+    if not term.isalpha():
+        # Identifiers such as "62.01.Z" or "123-456-78-90" are matched whole
+        return _SEPARATORS.sub("", term)
+
+    for suffix in POLISH_SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= MIN_STEM_LENGTH:
+            term = term[:-len(suffix)]
+            break
+
+    # Fleeting e: "podatek" -> "podatk", as in "podatku"
+    if term.endswith("ek") and len(term) > MIN_STEM_LENGTH:
+        term = term[:-2] + "k"
+    return term
+
+
+def fold(term: str) -> str:
+    """Remove diacritics, so queries typed without Polish letters still match"""
+    decomposed = unicodedata.normalize("NFKD", term.translate(_FOLDED_LETTERS))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def search_terms(text: str) -> List[str]:
+    """Split text into the normalized terms stored in and queried from the index"""
+    return [stem(fold(token)) for token in tokenize(text)]
+
+
+def _indexed_text(text: str) -> str:
+    return " ".join(search_terms(text))
+
+
+def _dialect(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+
+def index_news(session: Session, news: News) -> None:
+    """Add or replace a news item in the full-text index (caller commits)"""
+    values = {
+        "news_id": news.id,
+        "title": _indexed_text(news.title),
+        "summary": _indexed_text(news.summary),
+        "content": _indexed_text(news.content),
+    }
+    if _dialect(session) == "postgresql":
+        session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (news_id, document) VALUES (:news_id, "
+                "setweight(to_tsvector('simple', :title), 'A') || "
+                "setweight(to_tsvector('simple', :summary), 'B') || "
+                "setweight(to_tsvector('simple', :content), 'C')) "
+                "ON CONFLICT (news_id) DO UPDATE SET document = excluded.document"
+            ),
+            values,
+        )
+    else:
+        delete_news_index(session, news.id)
+        session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, summary, content) "
+                "VALUES (:news_id, :title, :summary, :content)"
+            ),
+            values,
+        )
+
+
+def delete_news_index(session: Session, news_id: int) -> None:
+    """Remove a news item from the full-text index (caller commits)"""
+    key = "news_id" if _dialect(session) == "postgresql" else "rowid"
+    session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE {key} = :news_id"), {"news_id": news_id})
+
+
+def reindex_news(session: Session) -> int:
+    """Rebuild the full-text index from every news item (caller commits)"""
+    session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    count = 0
+    for news in session.exec(select(News)).all():
+        index_news(session, news)
+        count += 1
+    return count
+
+
+def search_query(
+    dialect: str,
+    query: str,
+    category: Optional[TaxCategory] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 10,
+) -> Optional[Select]:
+    """Build a query of (news, rank) pairs, best match first
+
+    Every query term must match, as a prefix of an indexed term so that
+    endings the stemmer leaves on still match. Returns None when the query
+    has no searchable terms, e.g. only stopwords.
+    """
+    terms = list(dict.fromkeys(search_terms(query)))
+    if not terms:
+        return None
+
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        # Weights of D, C, B and A labelled lexemes (unused, content, summary, title), at most 1
+        weights = literal_column(
+            f"'{{0, {CONTENT_WEIGHT / TITLE_WEIGHT}, {SUMMARY_WEIGHT / TITLE_WEIGHT}, 1}}'::float4[]"
+        )
+        rank = func.ts_rank_cd(weights, _search_table.c.document, ts_query)
+        statement = (
+            select(News, rank.label("rank"))
+            .select_from(_search_table.join(News, News.id == _search_table.c.news_id))
+            .where(_search_table.c.document.op("@@")(ts_query))
+        )
+    else:
+        # bm25() is lower for better matches
+        rank = literal_column(f"-bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}, {CONTENT_WEIGHT})")
+        statement = (
+            select(News, rank.label("rank"))
+            .select_from(_search_table.join(News, News.id == _search_table.c.rowid))
+            .where(text(f"{SEARCH_TABLE} MATCH :match").bindparams(
+                match=" ".join(f'"{term}"*' for term in terms)
+            ))
+        )
+
+    if category is not None:
+        statement = statement.where(News.category == category)
+    if date_from is not None:
+        statement = statement.where(News.published_date >= date_from)
+    if date_to is not None:
+        statement = statement.where(News.published_date <= date_to)
+
+    return (
+        statement
+        .order_by(literal_column("rank").desc(), News.published_date.desc(), News.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+
+
+def _matches(text: str, terms: Sequence[str]) -> List[Tuple[int, int, bool]]:
+    """Words of a text as (start, end, matched) spans"""
+    words = []
+    for match in TOKEN_PATTERN.finditer(unicodedata.normalize("NFC", text)):
+        term = stem(fold(match.group().lower()))
+        words.append((match.start(), match.end(), any(term.startswith(query) for query in terms)))
+    return words
+
+
+def _mark(text: str, words: Sequence[Tuple[int, int, bool]], start: int, end: int) -> str:
+    parts = []
+    position = start
+    for word_start, word_end, matched in words:
+        if not matched or word_start < start or word_end > end:
+            continue
+        parts.append(html.escape(text[position:word_start]))
+        parts.append(f"<mark>{html.escape(text[word_start:word_end])}</mark>")
+        position = word_end
+    parts.append(html.escape(text[position:end]))
+    return "".join(parts)
+
+
+def highlight(text: str, query: str) -> str:
+    """HTML-escape a text, marking the words that match a query"""
+    text = unicodedata.normalize("NFC", text)
+    return _mark(text, _matches(text, search_terms(query)), 0, len(text))
+
+
+def snippet(text: str, query: str, words: Optional[int] = None) -> str:
+    """HTML-escaped excerpt of a text around its first match, with matches marked"""
+    words = words or settings.NEWS_SEARCH_SNIPPET_WORDS
+    text = unicodedata.normalize("NFC", text.strip())
+    spans = _matches(text, search_terms(query))
+    if not spans:
+        return html.escape(" ".join(text.split()[:words]))
+
+    # Start a few words before the first match, so it is read in context
+    first = next((index for index, span in enumerate(spans) if span[2]), 0)
+    begin = max(0, min(first - words // 5, len(spans) - words))
+    window = spans[begin:begin + words]
+    start, end = window[0][0], window[-1][1]
+
+    excerpt = _mark(text, window, start, end)
+    excerpt = " ".join(excerpt.split())
+    prefix = "… " if begin > 0 else ""
+    suffix = " …" if begin + words < len(spans) else ""
+    return f"{prefix}{excerpt}{suffix}"
@@ -0,0 +1,133 @@
+from functools import cached_property
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.config import settings
+from app.services.chunking import count_tokens
+
+
+class RegisteredPrompt:
+    """Prompt template compiled once at import, with a version for cache keys"""
+
+    def __init__(self, name: str, version: str, text: str):
+        self.name = name
+        self.version = version
+        self.template = ChatPromptTemplate.from_template(text)
+
+    @cached_property
+    def overhead_tokens(self) -> int:
+        """Tokens of the template text without its variables"""
+        empty = {variable: "" for variable in self.template.input_variables}
+        return count_tokens(self.template.format(**empty), settings.CHAT_MODEL)
+
+
+# Bump a prompt's version whenever its text or inputs change so cached outputs are regenerated
+PERSONALIZED_SUMMARY = RegisteredPrompt(
+    "personalized_summary",
+    "2",
+    """You are an AI tax advisor for a company with the following profile:
+        
+        Company Name: {company_name}
+        NIP (Tax ID): {nip}
+        VAT ID: {vat_id}
+        Industry: {industry}
+        Company Type: {company_type}
+        PKD Code: {pkd_code}
+        
+        Tax Information:
+        - Uses reduced CIT rate (9%): {cit_rate_reduced}
+        - Uses Estonian CIT: {estonian_cit}
+        - Revenue Range: {revenue_range}
+        - Has related party transactions > 10M PLN: {related_party_transactions}
+        - Uses R&D tax relief: {rd_relief}
+        - Employee Count: {employee_count}
+        - Annual Revenue: {annual_revenue} PLN
+        
+        I want you to explain why the following tax news is relevant to this specific company:
+        
+        Title: {news_title}
+        Category: {news_category}
+        Content: {news_content}
+        
+        Provide a personalized explanation (2-3 paragraphs) of why this news matters to this specific company, 
+        considering their profile, tax situation, and business characteristics. Be specific and actionable.
+        """
+)
+
+DOCUMENT_ANSWER = RegisteredPrompt(
+    "document_answer",
+    "2",
+    """You are an AI assistant helping with tax document analysis.
+        
+        Use the following context to answer the question. If you don't know the answer based on the context, 
+        say "I don't have enough information to answer this question based on the document."
+        
+        Summary of the earlier conversation:
+        {summary}
+        
+        Recent conversation:
+        {history}
+        
+        Context:
+        {context}
+        
+        Question: {question}
+        
+        Answer:
+        """
+)
+
+CONDENSE_QUESTION = RegisteredPrompt(
+    "condense_question",
+    "1",
+    """Given the conversation below, rewrite the follow-up question as a standalone question
+        that can be understood without the conversation. Keep the language of the question.
+        Return only the rewritten question.
+        
+        Summary of the earlier conversation:
+        {summary}
+        
+        Recent conversation:
+        {history}
+        
+        Follow-up question: {question}
+        
+        Standalone question:
+        """
+)
+
+CHAT_SUMMARY = RegisteredPrompt(
+    "chat_summary",
+    "1",
+    """You maintain a running summary of a conversation about a tax document.
+        
+        Update the summary with the new messages. Keep facts, figures, dates and the topics
+        the user asked about; drop pleasantries. Use at most {max_words} words.
+        
+        Current summary:
+        {summary}
+        
+        New messages:
+        {messages}
+        
+        Updated summary:
+        """
+)
+
+LIBRARY_ANSWER = RegisteredPrompt(
+    "library_answer",
+    "1",
+    """You are an AI assistant helping a tax team with questions across all of their documents.
+        
+        Use the numbered sources below to answer the question. Cite every source you use by its
+        number in square brackets, for example [1] or [2][3]. If the sources don't contain the answer,
+        say "I don't have enough information to answer this question based on your documents."
+        
+        Sources:
+        {context}
+        
+        Question: {question}
+        
+        Answer:
+        """
+)
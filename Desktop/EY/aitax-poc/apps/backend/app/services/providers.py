@@ -0,0 +1,109 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, Type
+
+import httpx
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from app.core.config import settings
+from app.services.fake_models import FakeChatModel, FakeEmbeddings, LatencyDistribution
+
+
+class ModelProvider(ABC):
+    """Creates the chat and embedding models behind the app's AI features"""
+
+    name = ""
+
+    def __init__(self, http_client: httpx.Client, async_http_client: httpx.AsyncClient):
+        self.http_client = http_client
+        self.async_http_client = async_http_client
+
+    @abstractmethod
+    def chat_model(self, model: str) -> BaseChatModel:
+        """Create a chat model"""
+
+    @abstractmethod
+    def embeddings(self, model: str) -> Embeddings:
+        """Create an embedding model"""
+
+    def model_key(self, model: str) -> str:
+        """Name a model in cache keys, so outputs of different providers never mix"""
+        return f"{self.name}:{model}"
+
+
+class OpenAIProvider(ModelProvider):
+    """OpenAI models over the shared connection pools"""
+
+    name = "openai"
+
+    def chat_model(self, model: str) -> BaseChatModel:
+        return ChatOpenAI(
+            model=model,
+            http_client=self.http_client,
+            http_async_client=self.async_http_client
+        )
+
+    def embeddings(self, model: str) -> Embeddings:
+        # Retries are handled by the embedding service
+        return OpenAIEmbeddings(
+            model=model,
+            chunk_size=settings.EMBEDDING_BATCH_SIZE,
+            max_retries=0,
+            http_client=self.http_client,
+            http_async_client=self.async_http_client
+        )
+
+    def model_key(self, model: str) -> str:
+        # Unprefixed, so keys written before providers existed stay valid
+        return model
+
+
+class FakeProvider(ModelProvider):
+    """Local deterministic models with simulated latency, for load tests without network or quota"""
+
+    name = "fake"
+
+    def __init__(self, http_client: httpx.Client, async_http_client: httpx.AsyncClient):
+        super().__init__(http_client, async_http_client)
+        self.rng = random.Random(settings.FAKE_LATENCY_SEED)
+
+    def _latency(self, mean_ms: float, stddev_ms: float) -> LatencyDistribution:
+        return LatencyDistribution(settings.FAKE_LATENCY_DISTRIBUTION, mean_ms, stddev_ms, self.rng)
+
+    def chat_model(self, model: str) -> BaseChatModel:
+        return FakeChatModel(
+            model_name=model,
+            response_words=settings.FAKE_RESPONSE_WORDS,
+            first_token_latency=self._latency(
+                settings.FAKE_CHAT_LATENCY_MS, settings.FAKE_CHAT_LATENCY_STDDEV_MS
+            ),
+            token_latency=self._latency(
+                settings.FAKE_TOKEN_LATENCY_MS, settings.FAKE_TOKEN_LATENCY_STDDEV_MS
+            )
+        )
+
+    def embeddings(self, model: str) -> Embeddings:
+        return FakeEmbeddings(
+            dimensions=settings.FAKE_EMBEDDING_DIMENSIONS,
+            latency=self._latency(
+                settings.FAKE_EMBEDDING_LATENCY_MS, settings.FAKE_EMBEDDING_LATENCY_STDDEV_MS
+            )
+        )
+
+
+PROVIDERS: Dict[str, Type[ModelProvider]] = {
+    provider.name: provider for provider in (OpenAIProvider, FakeProvider)
+}
+
+
+def create_provider(
+    name: str,
+    http_client: httpx.Client,
+    async_http_client: httpx.AsyncClient,
+) -> ModelProvider:
+    """Create the model provider registered under a name"""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown model provider: {name}")
+    return PROVIDERS[name](http_client, async_http_client)
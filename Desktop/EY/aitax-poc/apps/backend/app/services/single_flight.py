@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Callable, Coroutine, Dict, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call
+
+    The first caller for a key starts the call; callers arriving while it runs
+    await the same result (or exception) instead of starting their own. The call
+    is shielded, so a caller that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.calls = metrics.counter(f"single_flight_{name}_calls_total", f"{name} calls started")
+        self.coalesced = metrics.counter(
+            f"single_flight_{name}_coalesced_total", f"Duplicate {name} calls that joined one in flight"
+        )
+        self.in_flight = metrics.gauge(f"single_flight_{name}_in_flight", f"{name} calls running")
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        self.in_flight.set(len(self._calls))
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, call: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        """Run a call, or join the identical call already in flight"""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.coalesced.inc()
+            return await asyncio.shield(task)
+
+        task = loop.create_task(call())
+        self._calls[key] = task
+        self.calls.inc()
+        self.in_flight.set(len(self._calls))
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import os
+from typing import Tuple
+from uuid import uuid4
+from weakref import WeakValueDictionary
+
+from fastapi import UploadFile
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException
+from app.models.document import Document
+
+# Locks of content paths in use, dropped once no upload or delete holds them
+_file_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+
+def content_path(content_hash: str, file_ext: str) -> str:
+    """Get the storage path for a file with the given SHA-256 hash"""
+    return os.path.join(settings.UPLOAD_DIR, content_hash[:2], f"{content_hash}.{file_ext}")
+
+
+def file_lock(file_path: str) -> asyncio.Lock:
+    """Get the lock serializing uploads and deletes of one content-addressed file
+
+    An upload holds it from moving its file into place until its document is
+    committed, and a delete from committing until the file is released, so
+    a delete never removes a file that a concurrent identical upload is
+    about to reference.
+    """
+    lock = _file_locks.get(file_path)
+    if lock is None:
+        lock = _file_locks[file_path] = asyncio.Lock()
+    return lock
+
+
+def commit_file(tmp_path: str, file_path: str) -> None:
+    """Move a fully written temporary file into place, unless identical content exists"""
+    if os.path.exists(file_path):
+        os.remove(tmp_path)
+        return
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    os.replace(tmp_path, file_path)
+
+
+async def store_upload(upload: UploadFile, file_ext: str, max_size: int) -> Tuple[str, str, int]:
+    """Copy an upload in chunks to a temporary file and return (temporary path, hash, size)
+
+    The caller moves the file to its content path with commit_file, holding
+    the path's file_lock until the referencing document is committed.
+    """
+    # The temporary file lives next to the final location so the move is atomic
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    await asyncio.to_thread(os.makedirs, tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{uuid4().hex}.{file_ext}")
+
+    digest = hashlib.sha256()
+    file_size = 0
+
+    buffer = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await upload.read(settings.UPLOAD_CHUNK_SIZE_BYTES):
+            file_size += len(chunk)
+            if file_size > max_size:
+                raise PayloadTooLargeException(
+                    detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB} MB"
+                )
+
+            digest.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+
+    await asyncio.to_thread(buffer.close)
+
+    return tmp_path, digest.hexdigest(), file_size
+
+
+def release_file(session: Session, file_path: str) -> None:
+    """Delete a file unless a committed document still references it
+
+    Call after the deleting transaction has committed, holding the path's
+    file_lock, so a rollback never leaves a document without its file.
+    """
+    referenced = session.exec(
+        select(Document.id).where(Document.file_path == file_path)
+    ).first()
+
+    if referenced is None and os.path.exists(file_path):
+        os.remove(file_path)
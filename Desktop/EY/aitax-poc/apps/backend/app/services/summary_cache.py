@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.news import News
+from app.models.profile import CompanyProfile
+from app.models.summary_cache import PersonalizedSummary
+from app.services.ai import generate_personalized_summary
+from app.services.clients import clients
+from app.services.prompts import PERSONALIZED_SUMMARY
+from app.services.single_flight import SingleFlight
+
+cache_hits = metrics.counter("summary_cache_hits", "Personalized summaries served from the cache")
+cache_misses = metrics.counter("summary_cache_misses", "Personalized summaries generated by the model")
+cache_hit_rate = metrics.gauge("summary_cache_hit_rate", "Share of personalized summary lookups served from the cache")
+duplicate_generations = metrics.counter(
+    "summary_duplicate_generations_total", "Personalized summaries generated again after another was stored"
+)
+
+# Users with identical profiles opening the same news at once share one generation
+summary_flight = SingleFlight("summary")
+
+# Fields that feed the personalized summary prompt
+PROFILE_PROMPT_FIELDS = (
+    "name",
+    "nip",
+    "vat_id",
+    "industry",
+    "company_type",
+    "pkd_code",
+    "cit_rate_reduced",
+    "estonian_cit",
+    "revenue_range",
+    "related_party_transactions",
+    "rd_relief",
+    "employee_count",
+    "annual_revenue",
+)
+NEWS_PROMPT_FIELDS = ("title", "category", "content")
+
+
+def _prompt_values(obj: Any, fields: tuple) -> Dict[str, Any]:
+    values = {}
+    for field in fields:
+        value = getattr(obj, field)
+        values[field] = value.value if isinstance(value, Enum) else value
+    return values
+
+
+def _fingerprint(values: Dict[str, Any]) -> str:
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def profile_fingerprint(profile: CompanyProfile) -> str:
+    """Get the SHA-256 hash of the profile fields used in the summary prompt"""
+    return _fingerprint(_prompt_values(profile, PROFILE_PROMPT_FIELDS))
+
+
+def news_prompt_values(news: News) -> Dict[str, Any]:
+    """Get the news fields used in the summary prompt"""
+    return _prompt_values(news, NEWS_PROMPT_FIELDS)
+
+
+def _summary_key(news_id: int, fingerprint: str) -> Dict[str, Any]:
+    return {
+        "news_id": news_id,
+        "profile_fingerprint": fingerprint,
+        "model": clients.chat_model_key,
+        "prompt_version": PERSONALIZED_SUMMARY.version,
+    }
+
+
+def _record_lookup(hit: bool) -> None:
+    (cache_hits if hit else cache_misses).inc()
+    cache_hit_rate.set(cache_hits.value / (cache_hits.value + cache_misses.value))
+
+
+def get_cached_summary(session: Session, news_id: int, fingerprint: str) -> Optional[str]:
+    """Get a cached summary for the current model and prompt version"""
+    entry = session.get(PersonalizedSummary, _summary_key(news_id, fingerprint))
+    return entry.summary if entry else None
+
+
+def store_summary(session: Session, news_id: int, fingerprint: str, summary: str) -> None:
+    """Store a summary, ignoring an entry another request already wrote"""
+    insert = postgresql_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(PersonalizedSummary).values(
+        **_summary_key(news_id, fingerprint), summary=summary
+    ).on_conflict_do_nothing()
+
+    result = session.execute(statement)
+    session.commit()
+
+    # Another process generated the same summary first, so this one was spent twice
+    if result.rowcount == 0:
+        duplicate_generations.inc()
+
+
+def store_summary_if_current(news: News, fingerprint: str, summary: str) -> bool:
+    """Store a summary unless the news was edited while it was being generated
+
+    The news row stays locked until the summary is stored, so an edit cannot
+    invalidate the cache between the check and the insert.
+    """
+    with Session(engine) as session:
+        current = session.get(News, news.id, with_for_update=True)
+        if current is None or news_prompt_values(current) != news_prompt_values(news):
+            return False
+
+        store_summary(session, news.id, fingerprint, summary)
+        return True
+
+
+async def coalesce_summary(
+    news: News,
+    profile: CompanyProfile,
+    generate: Callable[[], Coroutine[Any, Any, str]],
+) -> str:
+    """Run a summary generation, or join an identical one already in flight
+
+    Calls are keyed by the prompt inputs, so an edited news item never joins a
+    generation started from its old text.
+    """
+    key = (
+        news.id,
+        _fingerprint(news_prompt_values(news)),
+        profile_fingerprint(profile),
+        clients.chat_model_key,
+        PERSONALIZED_SUMMARY.version,
+    )
+    return await summary_flight.do(key, generate)
+
+
+async def get_personalized_summary(session: AsyncSession, news: News, profile: CompanyProfile) -> str:
+    """Get a personalized summary from the cache, generating it on a miss"""
+    fingerprint = profile_fingerprint(profile)
+
+    summary = await session.run_sync(get_cached_summary, news.id, fingerprint)
+    _record_lookup(summary is not None)
+    if summary is not None:
+        return summary
+
+    async def generate() -> str:
+        summary = await generate_personalized_summary(news, profile)
+        # A stale summary is still shown to this viewer, but not cached
+        await asyncio.to_thread(store_summary_if_current, news, fingerprint, summary)
+        return summary
+
+    return await coalesce_summary(news, profile, generate)
+
+
+def invalidate_news_summaries(session: Session, news_id: int) -> None:
+    """Delete cached summaries of a news item (caller commits)"""
+    session.execute(delete(PersonalizedSummary).where(PersonalizedSummary.news_id == news_id))
+
+
+def invalidate_profile_summaries(session: Session, fingerprint: str) -> None:
+    """Delete cached summaries generated for a profile fingerprint (caller commits)"""
+    session.execute(
+        delete(PersonalizedSummary).where(PersonalizedSummary.profile_fingerprint == fingerprint)
+    )
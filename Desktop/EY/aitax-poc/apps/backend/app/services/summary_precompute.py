@@ -0,0 +1,130 @@
+import asyncio
+from typing import List
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.metrics import metrics
+from app.models.news import News
+from app.models.profile import CompanyProfile
+from app.models.summary_cache import PersonalizedSummary
+from app.models.user import User
+from app.services.ai import generate_personalized_summary
+from app.services.chunking import count_tokens
+from app.services.clients import clients
+from app.services.prompts import PERSONALIZED_SUMMARY
+from app.services.summary_cache import (
+    coalesce_summary,
+    profile_fingerprint,
+    store_summary_if_current,
+)
+
+precomputed = metrics.counter("summary_precompute_generated_total", "Personalized summaries generated ahead of views")
+precompute_failed = metrics.counter("summary_precompute_failed_total", "Personalized summaries that failed to precompute")
+over_budget = metrics.counter("summary_precompute_over_budget_total", "Profiles skipped by the precompute token budget")
+estimated_tokens = metrics.counter("summary_precompute_estimated_tokens_total", "Estimated tokens spent on precomputed summaries")
+
+# Profile field values filled into the summary prompt
+PROFILE_VALUES_TOKENS = 100
+
+
+def estimate_summary_tokens(news: News) -> int:
+    """Estimate the prompt and completion tokens of one personalized summary"""
+    news_tokens = (
+        count_tokens(news.title, settings.CHAT_MODEL)
+        + min(count_tokens(news.content, settings.CHAT_MODEL), settings.NEWS_CONTENT_MAX_TOKENS)
+    )
+    prompt_tokens = PERSONALIZED_SUMMARY.overhead_tokens + PROFILE_VALUES_TOKENS + news_tokens
+    return prompt_tokens + settings.SUMMARY_PRECOMPUTE_OUTPUT_TOKENS
+
+
+def _pending_profiles(session: Session, news: News) -> List[CompanyProfile]:
+    """Profiles of active users without a cached summary, most recently active first"""
+    cached = set(session.exec(
+        select(PersonalizedSummary.profile_fingerprint).where(
+            PersonalizedSummary.news_id == news.id,
+            PersonalizedSummary.model == clients.chat_model_key,
+            PersonalizedSummary.prompt_version == PERSONALIZED_SUMMARY.version
+        )
+    ).all())
+
+    profiles = session.exec(
+        select(CompanyProfile)
+        .join(User, User.id == CompanyProfile.user_id)
+        .where(User.is_active == True)
+        .order_by(User.last_login_at.desc().nullslast(), User.id)
+    ).all()
+
+    # Profiles with identical prompt fields share one summary
+    pending = []
+    for profile in profiles:
+        fingerprint = profile_fingerprint(profile)
+        if fingerprint not in cached:
+            cached.add(fingerprint)
+            pending.append(profile)
+
+    return pending
+
+
+async def precompute_news_summaries(news_id: int) -> int:
+    """Generate personalized summaries of a news item for every active profile
+    
+    Profiles are processed most recently active first, with bounded concurrency,
+    until the estimated token budget for the news item is spent. Returns the
+    number of summaries stored.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        news = await session.get(News, news_id)
+        if news is None:
+            return 0
+        profiles = await session.run_sync(_pending_profiles, news)
+
+    # Stop scheduling once the next summary would exceed the budget
+    cost = estimate_summary_tokens(news)
+    affordable = max(0, settings.SUMMARY_PRECOMPUTE_TOKEN_BUDGET // cost)
+    if len(profiles) > affordable:
+        over_budget.inc(len(profiles) - affordable)
+        profiles = profiles[:affordable]
+
+    queue: "asyncio.Queue[CompanyProfile]" = asyncio.Queue()
+    for profile in profiles:
+        queue.put_nowait(profile)
+
+    stored = 0
+    stale = False
+
+    async def work() -> None:
+        nonlocal stored, stale
+        while not queue.empty() and not stale:
+            profile = queue.get_nowait()
+            outcome = {}
+
+            async def generate() -> str:
+                summary = await generate_personalized_summary(news, profile)
+                estimated_tokens.inc(cost)
+                outcome["stored"] = await asyncio.to_thread(
+                    store_summary_if_current, news, profile_fingerprint(profile), summary
+                )
+                return summary
+
+            try:
+                await coalesce_summary(news, profile, generate)
+                if "stored" not in outcome:
+                    # Joined a generation a viewer had already started
+                    continue
+                if outcome["stored"]:
+                    precomputed.inc()
+                    stored += 1
+                else:
+                    # A newer edit schedules its own precompute
+                    stale = True
+            except Exception as e:
+                precompute_failed.inc()
+                print(f"Error precomputing summary of news {news_id} for profile {profile.id}: {str(e)}")
+
+    workers = min(settings.SUMMARY_PRECOMPUTE_CONCURRENCY, len(profiles))
+    await asyncio.gather(*(work() for _ in range(workers)))
+
+    return stored
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+from weakref import WeakValueDictionary
+
+import numpy as np
+from langchain_core.documents import Document as LangchainDocument
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.lexical_index import LexicalIndex, load_lexical_index
+from app.services.vector_store import get_document_chunks
+
+cache_hits = metrics.counter("vector_cache_hits", "Document searches served in-process")
+cache_misses = metrics.counter("vector_cache_misses", "Document vector loads from Chroma")
+cache_evictions = metrics.counter("vector_cache_evictions", "Documents evicted from the vector cache")
+cache_bytes = metrics.gauge("vector_cache_bytes", "Memory held by the vector cache")
+
+
+class CachedDocument:
+    """Chunk vectors of one document held in a contiguous, normalized matrix"""
+
+    def __init__(
+        self,
+        version: Any,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: Sequence[Sequence[float]],
+        lexical: Optional[LexicalIndex] = None,
+    ):
+        self.version = version
+        self.texts = texts
+        self.metadatas = metadatas
+
+        # Documents indexed before lexical indexes existed get one built from their chunks
+        self.positions = {metadata.get("chunk_index"): i for i, metadata in enumerate(metadatas)}
+        if lexical is None:
+            lexical = LexicalIndex.build(
+                (chunk_index, texts[i]) for chunk_index, i in self.positions.items()
+            )
+        self.lexical = lexical
+
+        # Normalize once so cosine similarity is a single matrix-vector product
+        if texts:
+            matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.matrix = matrix / norms
+
+    @property
+    def nbytes(self) -> int:
+        # Text size is approximated by character count
+        return self.matrix.nbytes + sum(len(text) for text in self.texts) + self.lexical.nbytes
+
+    def vector_rank(self, query_vector: Sequence[float], k: int) -> List[int]:
+        """Positions of the k chunks closest to a query vector by cosine similarity, best first"""
+        if not self.texts:
+            return []
+
+        query = np.array(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        scores = self.matrix @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [int(i) for i in top[np.argsort(-scores[top])]]
+
+    def lexical_rank(self, query: str, k: int) -> List[int]:
+        """Positions of the k chunks best matching a query by BM25, best first"""
+        return [
+            self.positions[chunk_index]
+            for chunk_index in self.lexical.search(query, k)
+            if chunk_index in self.positions
+        ]
+
+    def documents(self, positions: Sequence[int]) -> List[LangchainDocument]:
+        """Get the chunks at the given positions"""
+        return [
+            LangchainDocument(page_content=self.texts[i], metadata=self.metadatas[i])
+            for i in positions
+        ]
+
+    def search(self, query_vector: Sequence[float], k: int) -> List[LangchainDocument]:
+        """Exact cosine top-k over the document's chunks"""
+        return self.documents(self.vector_rank(query_vector, k))
+
+
+class HotVectorCache:
+    """LRU cache of document chunk vectors under a memory budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, CachedDocument]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Locks live while a load holds or awaits them, so idle documents leave none behind
+        self._load_locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+    def get(self, document_id: int, version: Any) -> Optional[CachedDocument]:
+        """Get a cached document if it matches the expected version"""
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(document_id)
+            return entry
+
+    def put(self, document_id: int, entry: CachedDocument) -> None:
+        """Cache a document, evicting the least recently used ones to stay in budget"""
+        if entry.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(document_id)
+            self._entries[document_id] = entry
+            self._bytes += entry.nbytes
+
+            while self._bytes > self.max_bytes:
+                evicted_id = next(iter(self._entries))
+                self._remove(evicted_id)
+                cache_evictions.inc()
+
+            cache_bytes.set(self._bytes)
+
+    def invalidate(self, document_id: int) -> None:
+        """Drop a document from the cache"""
+        with self._lock:
+            self._remove(document_id)
+            cache_bytes.set(self._bytes)
+
+    def _remove(self, document_id: int) -> None:
+        entry = self._entries.pop(document_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _load_lock(self, document_id: int) -> asyncio.Lock:
+        """Get the lock serializing loads of one document"""
+        lock = self._load_locks.get(document_id)
+        if lock is None:
+            lock = self._load_locks[document_id] = asyncio.Lock()
+        return lock
+
+    async def get_or_load(self, document_id: int, version: Any, user_id: int) -> Optional[CachedDocument]:
+        """Get a document's vectors, loading them from Chroma on first use"""
+        entry = self.get(document_id, version)
+        if entry is not None:
+            cache_hits.inc()
+            return entry
+
+        # Concurrent questions on the same document share a single load
+        async with self._load_lock(document_id):
+            entry = self.get(document_id, version)
+            if entry is not None:
+                cache_hits.inc()
+                return entry
+
+            cache_misses.inc()
+            texts, metadatas, vectors = await asyncio.to_thread(get_document_chunks, document_id, user_id)
+            lexical = await asyncio.to_thread(load_lexical_index, document_id)
+            entry = CachedDocument(version, texts, metadatas, vectors, lexical)
+            self.put(document_id, entry)
+
+        return entry
+
+
+# Create vector cache instance
+vector_cache = HotVectorCache(settings.VECTOR_CACHE_MAX_MB * 1024 * 1024)
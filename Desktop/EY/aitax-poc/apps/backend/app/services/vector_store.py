@@ -0,0 +1,205 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document as LangchainDocument
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.document import Document
+from app.services.clients import clients, get_collection_name
+
+
+def get_vectorstore() -> Chroma:
+    """Get the shared vector store holding chunks of documents indexed before partitioning"""
+    return clients.vectorstore
+
+
+def get_partition(user_id: int):
+    """Get the collection holding a user's document chunks"""
+    return clients.partition(user_id)
+
+
+def _document_collections(user_id: int) -> list:
+    # Documents indexed before partitioning stay in the shared collection until moved
+    return [get_partition(user_id), get_vectorstore()._collection]
+
+
+def _all_collections() -> list:
+    """The shared collection and every partition of it"""
+    prefix = get_collection_name()
+    return [
+        collection for collection in clients.chroma.list_collections()
+        if collection.name.startswith(prefix)
+    ]
+
+
+def _iter_batches(
+    collection,
+    where: Optional[Dict[str, Any]] = None,
+    include: Optional[List[str]] = None,
+):
+    """Page through a collection and yield one get() result per batch"""
+    offset = 0
+    while True:
+        result = collection.get(
+            where=where,
+            limit=settings.VECTOR_SYNC_BATCH_SIZE,
+            offset=offset,
+            include=include or []
+        )
+        if not result["ids"]:
+            return
+
+        yield result
+        offset += len(result["ids"])
+
+
+def _delete_ids(collection, ids: List[str]) -> None:
+    """Delete vectors by ID in batches"""
+    batch_size = settings.VECTOR_SYNC_BATCH_SIZE
+    for i in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[i:i + batch_size])
+
+
+def get_document_chunks(document_id: int, user_id: int) -> Tuple[List[str], List[dict], List[List[float]]]:
+    """Load the texts, metadata and vectors of every chunk of a document"""
+    where = {"document_id": str(document_id)}
+    texts, metadatas, vectors = [], [], []
+
+    for collection in _document_collections(user_id):
+        for batch in _iter_batches(collection, where, include=["documents", "metadatas", "embeddings"]):
+            texts.extend(batch["documents"])
+            metadatas.extend(batch["metadatas"])
+            vectors.extend(batch["embeddings"])
+        if texts:
+            break
+
+    return texts, metadatas, vectors
+
+
+def delete_document_vectors(document_id: int, user_id: int) -> int:
+    """Delete every chunk vector of a document and return how many were removed"""
+    where = {"document_id": str(document_id)}
+    removed = 0
+
+    for collection in _document_collections(user_id):
+        # Collect IDs first, since deleting while paging would shift offsets
+        ids = [id_ for batch in _iter_batches(collection, where) for id_ in batch["ids"]]
+        _delete_ids(collection, ids)
+        removed += len(ids)
+
+    return removed
+
+
+def update_document_vector_metadata(document_id: int, user_id: int, fields: Dict[str, Any]) -> int:
+    """Update metadata on every chunk vector of a document and return how many changed"""
+    where = {"document_id": str(document_id)}
+    updated = 0
+
+    for collection in _document_collections(user_id):
+        for batch in _iter_batches(collection, where, include=["metadatas"]):
+            collection.update(
+                ids=batch["ids"],
+                metadatas=[{**metadata, **fields} for metadata in batch["metadatas"]]
+            )
+            updated += len(batch["ids"])
+
+    return updated
+
+
+def query_partition(
+    user_id: int,
+    query_vector: Sequence[float],
+    k: int,
+    where: Dict[str, Any],
+) -> List[Tuple[LangchainDocument, float]]:
+    """Find the k chunks in a user's partition closest to a vector, with cosine similarities"""
+    result = get_partition(user_id).query(
+        query_embeddings=[list(query_vector)],
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+
+    return [
+        (LangchainDocument(page_content=text, metadata=metadata or {}), 1 - distance)
+        for text, metadata, distance in zip(
+            result["documents"][0], result["metadatas"][0], result["distances"][0]
+        )
+    ]
+
+
+def _existing_document_ids(document_ids: Set[str]) -> Set[str]:
+    """Get the IDs among a set that belong to documents in the database"""
+    numeric_ids = [int(id_) for id_ in document_ids if id_ is not None and id_.isdigit()]
+    if not numeric_ids:
+        return set()
+
+    with Session(engine) as session:
+        return {str(id_) for id_ in session.exec(select(Document.id).where(Document.id.in_(numeric_ids))).all()}
+
+
+def reconcile_orphaned_vectors() -> int:
+    """Purge vectors whose document no longer exists and return how many were removed"""
+    with Session(engine) as session:
+        document_ids = {str(id_) for id_ in session.exec(select(Document.id)).all()}
+
+    removed = 0
+    for collection in _all_collections():
+        candidates: Dict[str, Optional[str]] = {}
+        for batch in _iter_batches(collection, include=["metadatas"]):
+            for id_, metadata in zip(batch["ids"], batch["metadatas"]):
+                document_id = (metadata or {}).get("document_id")
+                if document_id not in document_ids:
+                    candidates[id_] = document_id
+
+        # Documents ingested since the snapshot are not orphans; check candidates again
+        existing = _existing_document_ids(set(candidates.values()))
+        orphan_ids = [id_ for id_, document_id in candidates.items() if document_id not in existing]
+
+        _delete_ids(collection, orphan_ids)
+        removed += len(orphan_ids)
+
+    return removed
+
+
+def move_legacy_vectors() -> int:
+    """Move chunks from the shared collection into their owners' partitions
+
+    Returns how many chunks were moved. Chunks of deleted documents are dropped.
+    """
+    legacy = get_vectorstore()._collection
+    with Session(engine) as session:
+        owners = {
+            str(id_): user_id
+            for id_, user_id in session.exec(select(Document.id, Document.user_id)).all()
+        }
+
+    moved = 0
+    while True:
+        # Always read the first page, since each page is deleted once moved
+        batch = legacy.get(
+            limit=settings.VECTOR_SYNC_BATCH_SIZE,
+            include=["documents", "metadatas", "embeddings"]
+        )
+        if not batch["ids"]:
+            return moved
+
+        by_user: Dict[int, List[int]] = defaultdict(list)
+        for i, metadata in enumerate(batch["metadatas"]):
+            user_id = owners.get((metadata or {}).get("document_id"))
+            if user_id is not None:
+                by_user[user_id].append(i)
+
+        for user_id, positions in by_user.items():
+            get_partition(user_id).upsert(
+                ids=[batch["ids"][i] for i in positions],
+                embeddings=[batch["embeddings"][i] for i in positions],
+                documents=[batch["documents"][i] for i in positions],
+                metadatas=[batch["metadatas"][i] for i in positions]
+            )
+            moved += len(positions)
+
+        _delete_ids(legacy, batch["ids"])
@@ -0,0 +1,32 @@
+"""
+Standalone ingestion worker.
+
+Run with ``python -m app.worker`` and set INGESTION_IN_PROCESS=false on the
+API so that uploads are only queued there and processed here.
+"""
+
+import asyncio
+
+from app.services.clients import clients
+from app.services.extraction import extraction_pool
+from app.services.ingestion import IngestionWorkerPool
+
+
+async def main() -> None:
+    """Run the ingestion worker pool until interrupted"""
+    clients.startup()
+    extraction_pool.startup()
+    worker_pool = IngestionWorkerPool()
+    await worker_pool.start()
+    print(f"Ingestion worker started with {worker_pool.concurrency} workers")
+    
+    try:
+        await worker_pool.join()
+    finally:
+        await worker_pool.stop()
+        await extraction_pool.shutdown()
+        await clients.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
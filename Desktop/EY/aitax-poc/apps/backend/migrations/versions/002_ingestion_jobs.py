@@ -0,0 +1,52 @@
+"""Ingestion job queue and document status
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Documents uploaded before the queue existed were processed inline
+    op.add_column(
+        'document',
+        sa.Column('status', sa.String(), nullable=False, server_default='READY')
+    )
+    
+    # Create ingestion_job table
+    op.create_table(
+        'ingestionjob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestionjob_document_id'), 'ingestionjob', ['document_id'], unique=False)
+    op.create_index(op.f('ix_ingestionjob_status'), 'ingestionjob', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestionjob_status'), table_name='ingestionjob')
+    op.drop_index(op.f('ix_ingestionjob_document_id'), table_name='ingestionjob')
+    op.drop_table('ingestionjob')
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.drop_column('status')
@@ -0,0 +1,39 @@
+"""Content-addressed uploads and embedding cache
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('document', sa.Column('content_hash', sa.String(), nullable=True))
+    op.create_index(op.f('ix_document_content_hash'), 'document', ['content_hash'], unique=False)
+    
+    # Create embedding_cache_entry table
+    op.create_table(
+        'embeddingcacheentry',
+        sa.Column('embedding_model', sa.String(), nullable=False),
+        sa.Column('chunk_hash', sa.String(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('embedding_model', 'chunk_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embeddingcacheentry')
+    op.drop_index(op.f('ix_document_content_hash'), table_name='document')
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.drop_column('content_hash')
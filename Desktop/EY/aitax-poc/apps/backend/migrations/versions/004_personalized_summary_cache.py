@@ -0,0 +1,43 @@
+"""Personalized news summary cache
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create personalized_summary table
+    op.create_table(
+        'personalizedsummary',
+        sa.Column('news_id', sa.Integer(), nullable=False),
+        sa.Column('profile_fingerprint', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('prompt_version', sa.String(), nullable=False),
+        sa.Column('summary', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['news_id'], ['news.id'], ),
+        sa.PrimaryKeyConstraint('news_id', 'profile_fingerprint', 'model', 'prompt_version')
+    )
+    op.create_index(
+        op.f('ix_personalizedsummary_profile_fingerprint'),
+        'personalizedsummary',
+        ['profile_fingerprint'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_personalizedsummary_profile_fingerprint'), table_name='personalizedsummary')
+    op.drop_table('personalizedsummary')
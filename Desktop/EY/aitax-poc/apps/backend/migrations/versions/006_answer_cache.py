@@ -0,0 +1,41 @@
+"""Semantic answer cache for document chat
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create answer_cache_entry table
+    op.create_table(
+        'answercacheentry',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('document_version', sa.DateTime(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('question', sa.String(), nullable=False),
+        sa.Column('question_vector', sa.LargeBinary(), nullable=False),
+        sa.Column('answer', sa.String(), nullable=False),
+        sa.Column('cost_tokens', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_answercacheentry_document_id'), 'answercacheentry', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_answercacheentry_document_id'), table_name='answercacheentry')
+    op.drop_table('answercacheentry')
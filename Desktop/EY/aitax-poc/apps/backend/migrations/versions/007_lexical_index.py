@@ -0,0 +1,33 @@
+"""Per-document lexical index for hybrid retrieval
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create lexical_index_entry table
+    op.create_table(
+        'lexicalindexentry',
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+        sa.PrimaryKeyConstraint('document_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('lexicalindexentry')
@@ -0,0 +1,34 @@
+"""Rolling summaries of document chats
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create chat_summary table
+    op.create_table(
+        'chatsummary',
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.String(), nullable=False),
+        sa.Column('summarized_until_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+        sa.PrimaryKeyConstraint('document_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chatsummary')
@@ -0,0 +1,49 @@
+"""Indexes for per-user and per-document lookups
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f('ix_chatmessage_document_id_created_at'),
+        'chatmessage',
+        ['document_id', 'created_at'],
+        unique=False
+    )
+    op.create_index(op.f('ix_note_user_id_news_id'), 'note', ['user_id', 'news_id'], unique=False)
+    op.create_index(op.f('ix_note_user_id_document_id'), 'note', ['user_id', 'document_id'], unique=False)
+    op.create_index(op.f('ix_document_user_id'), 'document', ['user_id'], unique=False)
+    
+    # Concurrent requests could give a user two profiles; which one to keep
+    # is for an operator to decide, so refuse to migrate rather than drop data
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT user_id FROM companyprofile GROUP BY user_id HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"Users {', '.join(map(str, duplicates))} have more than one company profile. "
+            "Delete all but one profile of each user, then run the migration again."
+        )
+    op.create_index(op.f('ix_companyprofile_user_id'), 'companyprofile', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_companyprofile_user_id'), table_name='companyprofile')
+    op.drop_index(op.f('ix_document_user_id'), table_name='document')
+    op.drop_index(op.f('ix_note_user_id_document_id'), table_name='note')
+    op.drop_index(op.f('ix_note_user_id_news_id'), table_name='note')
+    op.drop_index(op.f('ix_chatmessage_document_id_created_at'), table_name='chatmessage')
@@ -0,0 +1,80 @@
+"""Indexes ending in the sort key and ID of paginated lists
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_news_published_date_id'), 'news', ['published_date', 'id'], unique=False)
+    
+    # Extend the per-user indexes with the sort key, so any page is an index range
+    op.create_index(
+        op.f('ix_document_user_id_created_at_id'),
+        'document',
+        ['user_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.drop_index(op.f('ix_document_user_id'), table_name='document')
+    
+    op.create_index(
+        op.f('ix_note_user_id_created_at_id'),
+        'note',
+        ['user_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        op.f('ix_note_user_id_news_id_created_at_id'),
+        'note',
+        ['user_id', 'news_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        op.f('ix_note_user_id_document_id_created_at_id'),
+        'note',
+        ['user_id', 'document_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.drop_index(op.f('ix_note_user_id_news_id'), table_name='note')
+    op.drop_index(op.f('ix_note_user_id_document_id'), table_name='note')
+    
+    op.create_index(
+        op.f('ix_chatmessage_document_id_created_at_id'),
+        'chatmessage',
+        ['document_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.drop_index(op.f('ix_chatmessage_document_id_created_at'), table_name='chatmessage')
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f('ix_chatmessage_document_id_created_at'),
+        'chatmessage',
+        ['document_id', 'created_at'],
+        unique=False
+    )
+    op.drop_index(op.f('ix_chatmessage_document_id_created_at_id'), table_name='chatmessage')
+    
+    op.create_index(op.f('ix_note_user_id_document_id'), 'note', ['user_id', 'document_id'], unique=False)
+    op.create_index(op.f('ix_note_user_id_news_id'), 'note', ['user_id', 'news_id'], unique=False)
+    op.drop_index(op.f('ix_note_user_id_document_id_created_at_id'), table_name='note')
+    op.drop_index(op.f('ix_note_user_id_news_id_created_at_id'), table_name='note')
+    op.drop_index(op.f('ix_note_user_id_created_at_id'), table_name='note')
+    
+    op.create_index(op.f('ix_document_user_id'), 'document', ['user_id'], unique=False)
+    op.drop_index(op.f('ix_document_user_id_created_at_id'), table_name='document')
+    
+    op.drop_index(op.f('ix_news_published_date_id'), table_name='news')
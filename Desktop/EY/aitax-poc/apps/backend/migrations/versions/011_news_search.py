@@ -0,0 +1,51 @@
+"""Full-text index of news
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+Run scripts/reindex_news.py afterwards to index existing news.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Create news_search table with a GIN index over the weighted terms
+        op.create_table(
+            'newssearch',
+            sa.Column('news_id', sa.Integer(), nullable=False),
+            sa.Column('document', postgresql.TSVECTOR(), nullable=False),
+            sa.ForeignKeyConstraint(['news_id'], ['news.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('news_id')
+        )
+        op.create_index(
+            op.f('ix_newssearch_document'),
+            'newssearch',
+            ['document'],
+            unique=False,
+            postgresql_using='gin'
+        )
+    else:
+        # FTS5 table keyed by news ID; terms are normalized before they are stored
+        op.execute(
+            "CREATE VIRTUAL TABLE newssearch USING fts5("
+            "title, summary, content, tokenize = 'unicode61 remove_diacritics 0')"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index(op.f('ix_newssearch_document'), table_name='newssearch')
+    op.drop_table('newssearch')
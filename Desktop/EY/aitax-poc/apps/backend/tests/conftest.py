@@ -0,0 +1,8 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read when app modules are first imported, so point them at a
+# throwaway SQLite database before any test imports them
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'test.db'}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from app.core.database import engine
+from app.core.query_plans import QUERIES, explain, prepare, uses_index
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="module")
+def connection():
+    """Connection to a database migrated to the latest revision"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(config, "head")
+
+    with engine.connect() as connection:
+        prepare(connection)
+        yield connection
+
+
+@pytest.mark.parametrize("name, query, index", QUERIES, ids=[name for name, _, _ in QUERIES])
+def test_query_uses_index(connection, name, query, index):
+    plan = explain(connection, query)
+    assert uses_index(plan, index), f"{name} does not use {index} without a sort:\n{plan}"
+
+
+@pytest.mark.parametrize("plan", [
+    "SEARCH chatmessage USING INDEX ix_chatmessage_document_id_created_at_id (document_id=?)\n"
+    "USE TEMP B-TREE FOR ORDER BY",
+    "Limit  (cost=8.17..8.18 rows=1 width=72)\n"
+    "  ->  Sort  (cost=8.17..8.18 rows=1 width=72)\n"
+    "        Sort Key: created_at DESC, id DESC\n"
+    "        ->  Index Scan using ix_chatmessage_document_id_created_at_id on chatmessage",
+    "Limit  (cost=0.16..8.19 rows=1 width=72)\n"
+    "  ->  Incremental Sort  (cost=0.16..8.19 rows=1 width=72)\n"
+    "        Presorted Key: created_at\n"
+    "        ->  Index Scan using ix_chatmessage_document_id_created_at_id on chatmessage",
+])
+def test_sorting_plans_are_rejected(plan):
+    assert not uses_index(plan, "ix_chatmessage_document_id_created_at_id")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of concurrent database-bound requests on the sync and async sessions.
+
+A request handler on the sync session blocks the event loop for as long as
+its query runs, so concurrent requests are served one after another; on the
+async session the loop keeps serving other requests while a query runs.
+Each request runs a query that waits in the database for a while, and
+the requests are sent concurrently through the ASGI app without a server.
+
+Usage: python benchmark_async_db.py [--requests 50] [--concurrency 10] [--latency-ms 100]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Annotated
+
+# Add the parent directory to the path to import app modules
+sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_engine, engine, get_async_session, get_session
+
+
+def _register_sleep(dbapi_connection, connection_record):
+    """Give SQLite connections the sleep function Postgres has as pg_sleep"""
+    dbapi_connection.create_function("pg_sleep", 1, time.sleep)
+
+
+# Waits in the database, standing in for a slow query or a distant server
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _register_sleep)
+    event.listen(async_engine.sync_engine, "connect", _register_sleep)
+
+
+def create_app(latency: float) -> FastAPI:
+    """Create an app with the same slow query behind a sync and an async session"""
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_endpoint(db: Annotated[Session, Depends(get_session)]):
+        db.connection().execute(SLOW_QUERY, {"seconds": latency})
+        return {"status": "ok"}
+
+    @app.get("/async")
+    async def async_endpoint(db: Annotated[AsyncSession, Depends(get_async_session)]):
+        await (await db.connection()).execute(SLOW_QUERY, {"seconds": latency})
+        return {"status": "ok"}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    """Send requests to a path with limited concurrency and return the elapsed time"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send():
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def benchmark_async_db(requests: int, concurrency: int, latency_ms: int):
+    """Compare request throughput of the sync and async sessions"""
+    print(f"Sending {requests} requests, {concurrency} at a time, each waiting {latency_ms} ms in the database...")
+
+    transport = httpx.ASGITransport(app=create_app(latency_ms / 1000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Warm up both connection pools
+        await run(client, "/sync", 1, 1)
+        await run(client, "/async", concurrency, concurrency)
+
+        single = await run(client, "/async", 1, 1)
+        results = {path: await run(client, path, requests, concurrency) for path in ("/sync", "/async")}
+
+    print(f"Single request: {single * 1000:.0f} ms")
+    for path, elapsed in results.items():
+        print(f"{path:>7}: {elapsed:.2f} s, {requests / elapsed:.1f} requests/s")
+    print(f"Async speedup: {results['/sync'] / results['/async']:.1f}x")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync and async database sessions")
+    parser.add_argument("--requests", type=int, default=50, help="Requests sent per session type")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--latency-ms", type=int, default=100, help="Time each query waits in the database")
+    args = parser.parse_args()
+
+    asyncio.run(benchmark_async_db(args.requests, args.concurrency, args.latency_ms))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN check that the hot endpoint queries are served by an index.
+
+Plans the queries in app.core.query_plans on the configured database and
+fails if a plan does not use the expected index, e.g. after a migration
+dropped it or a query changed shape. The same check runs in the test suite
+on a freshly migrated SQLite database.
+
+Run it against a migrated database, e.g. after `alembic upgrade head`.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path to import app modules
+sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from app.core.database import engine
+from app.core.query_plans import QUERIES, explain, prepare, uses_index
+
+
+def explain_queries():
+    """Check the plan of every hot query"""
+    print(f"Explaining queries on {engine.dialect.name}...")
+
+    failures = 0
+    with engine.connect() as connection:
+        prepare(connection)
+
+        for name, query, index in QUERIES:
+            plan = explain(connection, query)
+            if uses_index(plan, index):
+                print(f"ok    {name}: {index}")
+            else:
+                failures += 1
+                print(f"FAIL  {name}: expected {index} without a sort")
+                print("      " + plan.replace("\n", "\n      "))
+
+    print(f"{len(QUERIES) - failures} of {len(QUERIES)} queries use their index.")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if explain_queries() else 1)
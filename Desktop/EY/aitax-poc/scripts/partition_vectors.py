@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+One-off job that moves document chunks from the shared collection into
+per-user partitions.
+
+Documents indexed before partitioning keep working from the shared
+collection, but are only found by library chat once moved. Safe to run
+again; it stops when the shared collection is empty.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path to import app modules
+sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from app.services.vector_store import move_legacy_vectors
+
+
+def partition_vectors():
+    """Move shared collection chunks into their owners' partitions"""
+    print("Moving document vectors into user partitions...")
+    
+    moved = move_legacy_vectors()
+    
+    print(f"Moved {moved} vectors.")
+
+
+if __name__ == "__main__":
+    partition_vectors()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Reconciliation job that purges vectors whose document no longer exists.
+
+Run it periodically (e.g. from cron) to clean up chunks left behind when
+a vector store delete failed or a document was deleted mid-ingestion.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path to import app modules
+sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from app.services.vector_store import reconcile_orphaned_vectors
+
+
+def reconcile_vectors():
+    """Purge orphaned vectors from the document collection"""
+    print("Reconciling document vectors...")
+    
+    removed = reconcile_orphaned_vectors()
+    
+    print(f"Removed {removed} orphaned vectors.")
+
+
+if __name__ == "__main__":
+    reconcile_vectors()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Job that rebuilds the full-text search index of news.
+
+Run it once after the migration that creates the index, and whenever the
+search normalization (stemming, stopwords) changes. News created, updated
+or deleted through the API is kept in sync without it.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path to import app modules
+sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from sqlmodel import Session
+from app.core.database import engine
+from app.services.news_search import reindex_news as rebuild_news_index
+
+
+def reindex_news():
+    """Index every news item for full-text search"""
+    print("Reindexing news for search...")
+    
+    with Session(engine) as session:
+        count = rebuild_news_index(session)
+        session.commit()
+    
+    print(f"Indexed {count} news items.")
+
+
+if __name__ == "__main__":
+    reindex_news()
@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).parent.parent / "apps" / "backend"))
 from sqlmodel import Session, select
 from app.core.database import engine
 from app.models.news import News, TaxCategory
+from app.services.news_search import index_news
 
 
 def seed_news():
@@ -94,10 +95,12 @@ def seed_news():
             print(f"Database already contains {len(existing_news)} news items. Skipping seed.")
             return
         
-        # Add news items
+        # Add news items and index them for search
         for item in news_items:
             news = News(**item)
             session.add(news)
+            session.flush()
+            index_news(session, news)
         
         session.commit()
         print(f"Successfully added {len(news_items)} news items to the database.")